@@ -0,0 +1,233 @@
+import os
+import sys
+import json
+import time
+import runpy
+import argparse
+import statistics
+import subprocess
+import tracemalloc
+
+base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(base_dir)
+
+default_scales = (1, 10, 100, 1000)
+
+def scaled_frame(df, scale):
+    # The export repeated `scale` times, each copy moved past the previous
+    # one in time and ids, so streaks, days and near misses keep their shape.
+    import pandas as pd
+    if scale == 1:
+        return df
+    span = df['datetime'].max() - df['datetime'].min() + pd.Timedelta(days=1)
+    id_step = int(df['id'].max()) + 1
+    copies = []
+    for k in range(scale):
+        part = df.copy()
+        part['datetime'] = part['datetime'] + span * k
+        part['id'] = part['id'] + id_step * k
+        copies.append(part)
+    return pd.concat(copies, ignore_index=True)
+
+def load_scripts(scale):
+    # The scripts share the data.dataset singleton; giving it the scaled
+    # frame before they run makes every script work on the scaled data.
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    from matplotlib.backend_bases import FigureCanvasBase
+    import warnings
+    from data.dataset import dataset, streamer_column
+    from data.cache import load_export
+    warnings.simplefilter('ignore', UserWarning)
+    # Only the hot paths are timed; nothing needs to be drawn.
+    FigureCanvasBase.draw_idle = lambda self, *args, **kwargs: None
+    plt.show = lambda *args, **kwargs: None
+    df = scaled_frame(load_export(dataset.source), scale)
+    df['styles'] = df['styles'].fillna('')
+    df['streamer'] = streamer_column(df)
+    dataset.__dict__['df'] = df
+    run = lambda path: runpy.run_path(os.path.join(base_dir, path), run_name='__main__')
+    return dataset, {
+        'map_styles': run('scripts/map_styles_pie_charts.py'),
+        'best_times': run('scripts/best_times_plot.py'),
+        'exact_matches': run('testing/exact_matches.py'),
+    }
+
+def benchmarks(dataset, ns):
+    # name -> (reset, work). reset drops every memo the work would reuse,
+    # so each repeat does the full computation.
+    from data.styles import StyleIndex
+    from data.dataset import streamer_names
+    from data import near_misses
+    pie = ns['map_styles']
+    best = ns['best_times']
+    exact = ns['exact_matches']
+    pie_modes = ('Most', 'Best [at]', 'Best [gold]', 'Worst [skips]')
+    durations = (2, 3, 10, 20, 30, 60)
+    thresholds = (5, 10, 20, 50)
+
+    def nothing():
+        pass
+
+    def build_style_index():
+        StyleIndex(dataset.df)
+
+    def calc_counts():
+        for state in pie['states'].values():
+            for mode in pie_modes:
+                pie['calc_counts'](state.df_x, mode)
+
+    def calculate_iterations():
+        # Every drill-down level of every mode at three cutoffs. The state
+        # is marked as initializing so its slider callbacks do not redraw.
+        for state in pie['states'].values():
+            state.initializing = True
+            for mode in pie_modes:
+                for cutoff in (0.02, 0.03, 0.05):
+                    state.order_mode = mode
+                    state.cutoff = cutoff
+                    state.chains.clear()
+                    state.calculate_iterations()
+                    state.compute_level(10)
+            state.initializing = False
+
+    def reset_stretches():
+        for cache in ('streamer_ats', 'best_stretches', 'best_curves', 'top_stretches'):
+            best[cache].clear()
+
+    def find_best_stretch():
+        for name in streamer_names:
+            for duration in durations:
+                best['find_best_stretch'](name, duration)
+
+    def overlay_data():
+        for duration in durations:
+            best['overlay_data'](streamer_names, duration)
+
+    def reset_near_misses():
+        near_misses.engine.metric_values.clear()
+        near_misses.engine.indexes.clear()
+
+    def filter_near_misses():
+        for name in streamer_names:
+            for threshold in thresholds:
+                near_misses.filter_near_misses(threshold, name)
+
+    def filter_reverse_near_misses():
+        for name in streamer_names:
+            for threshold in thresholds:
+                near_misses.filter_reverse_near_misses(threshold * 100, name)
+
+    def reset_pie_history():
+        for state in exact['states'].values():
+            state.stacks.clear()
+
+    def go_deeper_replay():
+        # What clicking "Other" until it stops changing does, for every mode.
+        for state in exact['states'].values():
+            for mode in ('Most', 'Best', 'Best [golds]', 'Worst [skips]'):
+                state.set_mode_and_reset(mode)
+                for _ in range(10):
+                    depth = len(state.stack)
+                    state.go_deeper()
+                    if len(state.stack) == depth:
+                        break
+
+    return {
+        'style_index': (nothing, build_style_index),
+        'calc_counts': (nothing, calc_counts),
+        'calculate_iterations': (nothing, calculate_iterations),
+        'find_best_stretch': (reset_stretches, find_best_stretch),
+        'overlay_data': (reset_stretches, overlay_data),
+        'filter_near_misses': (reset_near_misses, filter_near_misses),
+        'filter_reverse_near_misses': (reset_near_misses, filter_reverse_near_misses),
+        'go_deeper_replay': (reset_pie_history, go_deeper_replay),
+    }
+
+def measure(reset, work, repeat):
+    times = []
+    for _ in range(repeat):
+        reset()
+        start = time.perf_counter()
+        work()
+        times.append(time.perf_counter() - start)
+    # Peak memory in a separate run: tracemalloc slows allocations down.
+    reset()
+    tracemalloc.start()
+    work()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return statistics.median(times), peak
+
+def run_scale(scale, repeat, only):
+    dataset, ns = load_scripts(scale)
+    rows = len(dataset.df)
+    results = []
+    for name, (reset, work) in benchmarks(dataset, ns).items():
+        if only and name not in only:
+            continue
+        seconds, peak = measure(reset, work, repeat)
+        results.append({
+            'benchmark': name,
+            'scale': scale,
+            'rows': rows,
+            'seconds': round(seconds, 6),
+            'rows_per_s': round(rows / seconds) if seconds > 0 else None,
+            'peak_bytes': peak,
+        })
+    return results
+
+def git_commit():
+    try:
+        out = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=base_dir, capture_output=True, text=True)
+        return out.stdout.strip() or None
+    except OSError:
+        return None
+
+def compare(results, old_file):
+    with open(old_file) as f:
+        old = {(r['benchmark'], r['scale']): r for r in json.load(f)['results']}
+    for r in results:
+        before = old.get((r['benchmark'], r['scale']))
+        if before:
+            ratio = r['seconds'] / before['seconds'] if before['seconds'] else float('inf')
+            print(f"{r['benchmark']:28s} {r['scale']:>5}x  {ratio:6.2f}x the time of {old_file}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time the analysis hot paths on the export repeated 1x to 1000x.")
+    parser.add_argument('--scales', type=int, nargs='+', default=list(default_scales))
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--only', nargs='+', help="benchmark names to run")
+    parser.add_argument('--json', help="write the results to this file")
+    parser.add_argument('--compare', help="results file of an earlier run to compare against")
+    parser.add_argument('--worker', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker is not None:
+        json.dump(run_scale(args.worker, args.repeat, args.only), sys.stdout)
+        return
+
+    # Each scale runs in its own process, so one scale's data and caches
+    # do not inflate the next one's memory.
+    results = []
+    for scale in args.scales:
+        cmd = [sys.executable, os.path.abspath(__file__), '--worker', str(scale), '--repeat', str(args.repeat)]
+        if args.only:
+            cmd += ['--only'] + args.only
+        proc = subprocess.run(cmd, capture_output=True, text=True, cwd=base_dir, env=dict(os.environ, PYTHONHASHSEED='0'))
+        if proc.returncode != 0:
+            print(proc.stderr, file=sys.stderr)
+            sys.exit(proc.returncode)
+        for r in json.loads(proc.stdout):
+            results.append(r)
+            print(f"{r['benchmark']:28s} {r['scale']:>5}x {r['rows']:>9} rows  {r['seconds'] * 1000:10.1f} ms"
+                  f"  {r['rows_per_s'] or 0:>12} rows/s  peak {r['peak_bytes'] / 2**20:8.1f} MiB")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'commit': git_commit(), 'python': sys.version.split()[0], 'repeat': args.repeat, 'results': results}, f, indent=1)
+    if args.compare:
+        compare(results, args.compare)
+
+if __name__ == "__main__":
+    main()
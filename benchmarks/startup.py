@@ -0,0 +1,141 @@
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+
+base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+scripts_dir = os.path.join(base_dir, 'scripts')
+budget_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'startup_budget.json')
+
+# Heavy packages the plain script menu must not load.
+menu_forbidden = ('matplotlib', 'pandas', 'numpy', 'tkinter')
+# New budgets leave this much headroom over the measured median, and never
+# go below the noise of starting an interpreter.
+budget_headroom = 1.5
+budget_floor_ms = 100
+
+# Runs a chart with the Agg backend and prints a line once its figure has
+# been drawn, so the parent can time interpreter start to first draw. Agg
+# draws on every draw_idle; GUI backends fold those into the first draw
+# after show, so they are dropped here as well.
+probe = '''
+import sys, runpy
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+from matplotlib.backend_bases import FigureCanvasBase
+FigureCanvasBase.draw_idle = lambda self, *args, **kwargs: None
+def show(*args, **kwargs):
+    plt.gcf().canvas.draw()
+    print('@first_draw', flush=True)
+plt.show = show
+sys.argv = sys.argv[1:]
+runpy.run_path(sys.argv[0], run_name='__main__')
+'''
+
+import_line = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)')
+
+def parse_importtime(stderr):
+    # Self time per top-level package, in ms.
+    packages = {}
+    for line in stderr.splitlines():
+        m = import_line.match(line)
+        if m:
+            package = m.group(4).split('.')[0]
+            packages[package] = packages.get(package, 0) + int(m.group(1)) / 1000
+    return packages
+
+def measure_script(path):
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, '-X', 'importtime', '-c', probe, path], cwd=base_dir, text=True,
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE, env=dict(os.environ, PYTHONHASHSEED='0')
+    )
+    first_draw = None
+    for line in proc.stdout:
+        if line.startswith('@first_draw') and first_draw is None:
+            first_draw = (time.perf_counter() - start) * 1000
+    stderr = proc.stderr.read()
+    proc.wait()
+    if first_draw is None:
+        raise RuntimeError(f"{path} did not draw a figure:\n{stderr[-2000:]}")
+    return first_draw, parse_importtime(stderr)
+
+def measure_menu():
+    # start.py up to its prompt; an empty answer makes it exit.
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', os.path.join(base_dir, 'start.py')],
+        input='\n', text=True, capture_output=True, cwd=base_dir
+    )
+    wall = (time.perf_counter() - start) * 1000
+    packages = parse_importtime(proc.stderr)
+    loaded = [p for p in menu_forbidden if p in packages]
+    if loaded:
+        raise RuntimeError(f"start.py imported {', '.join(loaded)} before showing the menu")
+    return wall, packages
+
+def summarize(runs):
+    walls = [wall for wall, _ in runs]
+    imports = [sum(packages.values()) for _, packages in runs]
+    packages = runs[-1][1]
+    top = sorted(packages.items(), key=lambda kv: -kv[1])[:5]
+    return {
+        'wall_ms': round(statistics.median(walls), 1),
+        'import_ms': round(statistics.median(imports), 1),
+        'top_imports_ms': {name: round(ms, 1) for name, ms in top},
+    }
+
+def run(repeat):
+    targets = {'start.py (menu)': measure_menu}
+    for script in sorted(os.listdir(scripts_dir)):
+        if script.endswith('.py'):
+            path = os.path.join(scripts_dir, script)
+            targets[f"scripts/{script}"] = lambda path=path: measure_script(path)
+    results = {}
+    for name, measure in targets.items():
+        # One untimed run first, so the export cache and the OS file cache
+        # are in place: this measures interpreter start, not a cold disk.
+        measure()
+        results[name] = summarize([measure() for _ in range(repeat)])
+        print(f"{name:45s} {results[name]['wall_ms']:8.0f} ms  (imports {results[name]['import_ms']:.0f} ms)")
+    return results
+
+def check_budget(results, budget):
+    over = []
+    for name, result in results.items():
+        limit = budget.get(name)
+        if limit is not None and result['wall_ms'] > limit:
+            over.append(f"{name}: {result['wall_ms']:.0f} ms > budget {limit} ms")
+    return over
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure start-up time to first draw of every chart script.")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--json', help="write the measurements to this file")
+    parser.add_argument('--write-budget', action='store_true', help="replace the budget with the current timings plus headroom")
+    args = parser.parse_args(argv)
+
+    results = run(args.repeat)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'python': sys.version.split()[0], 'repeat': args.repeat, 'results': results}, f, indent=1)
+    if args.write_budget:
+        budget = {name: max(budget_floor_ms, int(round(r['wall_ms'] * budget_headroom, -1))) for name, r in results.items()}
+        with open(budget_file, 'w') as f:
+            json.dump(budget, f, indent=1, sort_keys=True)
+            f.write('\n')
+        print(f"Wrote {budget_file}")
+        return
+    with open(budget_file) as f:
+        over = check_budget(results, json.load(f))
+    for line in over:
+        print(f"Over budget: {line}")
+    sys.exit(1 if over else 0)
+
+if __name__ == "__main__":
+    main()
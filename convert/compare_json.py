@@ -1,42 +1,129 @@
+import sys
 import json
-import os
+import hashlib
 import argparse
+from array import array
 
-def compare_json_ids(file1_path, file2_path):
-    file1_path = os.path.abspath(file1_path)
-    file2_path = os.path.abspath(file2_path)
+import numpy as np
 
-    with open(file1_path, 'r', encoding='utf-8') as file1:
-        data1 = json.load(file1)
+def iter_entries(path, chunk_size=1 << 20):
+    # The objects of the export's top-level array one at a time; only the
+    # current chunk of text is held in memory.
+    decoder = json.JSONDecoder()
+    with open(path, 'r', encoding='utf-8-sig') as f:
+        buf = f.read(chunk_size).lstrip()
+        if not buf.startswith('['):
+            raise ValueError(f"{path}: expected a JSON array")
+        pos = 1
+        eof = False
+        while True:
+            while pos < len(buf) and buf[pos] in ' \t\r\n,':
+                pos += 1
+            if pos < len(buf) and buf[pos] == ']':
+                return
+            try:
+                if pos == len(buf):
+                    raise json.JSONDecodeError("need more data", buf, pos)
+                entry, pos = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                chunk = f.read(chunk_size)
+                eof = not chunk
+                buf = buf[pos:] + chunk
+                pos = 0
+                continue
+            yield entry
 
-    with open(file2_path, 'r', encoding='utf-8') as file2:
-        data2 = json.load(file2)
+def row_hash(entry):
+    # The same run written by another tool (key order, spacing) hashes the same.
+    text = json.dumps(entry, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return int.from_bytes(hashlib.blake2b(text.encode('utf-8'), digest_size=8).digest(), 'little')
 
-    ids1 = {entry['id'] for entry in data1}
-    ids2 = {entry['id'] for entry in data2}
+def read_ids(path):
+    # Sorted ids and their row hashes, plus the ids that appear more than once.
+    ids = array('q')
+    hashes = array('Q')
+    for entry in iter_entries(path):
+        ids.append(entry['id'])
+        hashes.append(row_hash(entry))
+    ids = np.frombuffer(ids, dtype=np.int64)
+    hashes = np.frombuffer(hashes, dtype=np.uint64)
+    order = np.argsort(ids, kind='stable')
+    ids = ids[order]
+    hashes = hashes[order]
+    repeated = ids[1:] == ids[:-1]
+    duplicates = np.unique(ids[1:][repeated])
+    # Of repeated ids only the last row counts, as it would for a reader
+    # that keys runs by id.
+    last = np.append(~repeated, True)
+    return ids[last], hashes[last], duplicates
 
-    only_in_file1 = ids1 - ids2
-    only_in_file2 = ids2 - ids1
+def compare_exports(paths):
+    files = [read_ids(path) for path in paths]
+    all_ids, counts = np.unique(np.concatenate([ids for ids, _, _ in files]), return_counts=True)
+    # Ids that are in exactly one file.
+    single = all_ids[counts == 1]
+    # One column per file with the row hash of each id, 0 where it is missing.
+    table = np.zeros((len(all_ids), len(files)), dtype=np.uint64)
+    present = np.zeros(table.shape, dtype=bool)
+    for i, (ids, hashes, _) in enumerate(files):
+        rows = np.searchsorted(all_ids, ids)
+        table[rows, i] = hashes
+        present[rows, i] = True
+    lowest = np.where(present, table, np.iinfo(np.uint64).max).min(axis=1)
+    highest = np.where(present, table, 0).max(axis=1)
+    changed = np.flatnonzero((lowest != highest) & (present.sum(axis=1) > 1))
 
-    if only_in_file1:
-        print("IDs only in File 1:")
-        for id in only_in_file1:
-            print(id)
-    else:
-        print("No unique IDs in File 1.")
+    return {
+        'files': paths,
+        'rows': {path: len(ids) for path, (ids, _, _) in zip(paths, files)},
+        'ids': len(all_ids),
+        'in_all': int(present.all(axis=1).sum()),
+        'only_in': {
+            path: np.intersect1d(ids, single, assume_unique=True).tolist()
+            for path, (ids, _, _) in zip(paths, files)
+        },
+        'missing_from': {
+            path: np.setdiff1d(all_ids, ids, assume_unique=True).tolist()
+            for path, (ids, _, _) in zip(paths, files)
+        },
+        'changed': [
+            {
+                'id': int(all_ids[row]),
+                'hashes': {
+                    path: format(int(table[row, i]), '016x') if present[row, i] else None
+                    for i, path in enumerate(paths)
+                },
+            }
+            for row in changed
+        ],
+        'duplicates': {path: dups.tolist() for path, (_, _, dups) in zip(paths, files) if len(dups)},
+    }
 
-    if only_in_file2:
-        print("IDs only in File 2:")
-        for id in only_in_file2:
-            print(id)
-    else:
-        print("No unique IDs in File 2.")
+def print_summary(diff, out=sys.stderr):
+    print(f"{diff['ids']} ids, {diff['in_all']} in every file, {len(diff['changed'])} changed between files", file=out)
+    for path in diff['files']:
+        print(
+            f"{path}: {diff['rows'][path]} rows, {len(diff['only_in'][path])} only here, "
+            f"{len(diff['missing_from'][path])} missing, {len(diff['duplicates'].get(path, []))} duplicated ids",
+            file=out
+        )
 
 if __name__ == "__main__":
-    parser = argparse.ArgumentParser(description="Compare IDs in two JSON files.")
-    parser.add_argument("file1", help="Path to the first JSON file.")
-    parser.add_argument("file2", help="Path to the second JSON file.")
+    parser = argparse.ArgumentParser(description="Compare the runs in two or more export JSON files.")
+    parser.add_argument("files", nargs='+', help="Paths to the JSON files.")
+    parser.add_argument("-o", "--output", default='-', help="Where to write the JSON diff (default: stdout).")
 
     args = parser.parse_args()
+    if len(args.files) < 2:
+        parser.error("need at least two files to compare")
 
-    compare_json_ids(args.file1, args.file2)
+    diff = compare_exports(args.files)
+    print_summary(diff)
+    if args.output == '-':
+        json.dump(diff, sys.stdout)
+        print()
+    else:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(diff, f)
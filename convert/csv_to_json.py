@@ -1,36 +1,196 @@
+import io
 import csv
+import sys
 import json
+import argparse
+import itertools
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 
-def csv_to_json(input_file, output_file):
-    data = []
-
-    with open(input_file, 'r', encoding='utf-8') as csv_file:
-        csv_reader = csv.DictReader(csv_file, delimiter=';')
-        
-        for row in csv_reader:
-            entry = {
-                "id": int(row["id"]),
-                "mapId": int(row["mapId"]),
-                "player": row["player"],
-                "datetime": row["datetime"].replace(' ', 'T').split('.')[0] + 'Z',
-                "medal": row["medal"],
-                "timeSpent": int(row["timeSpent"]),
-                "mapper": row["mapper"],
-                "styles": row["styles"],
-                "skipType": row["skipType"],
-                "atTime": int(row["atTime"]),
-                "finalTime": int(row["finalTime"]),
-                "currentMedalCount": int(row["currentMedalCount"]),
-                "freeSkipCount": int(row["freeSkipCount"]),
-                "pbBeforeFin": int(row["pbBeforeFin"]),
-                "mapTitle": row["mapTitle"],
-                "currentGoldCount": int(row["currentGoldCount"])
-            }
-            data.append(entry)
+int_fields = [
+    "id", "mapId", "timeSpent", "atTime", "finalTime", "currentMedalCount",
+    "freeSkipCount", "pbBeforeFin", "currentGoldCount"
+]
+fields = [
+    "id", "mapId", "player", "datetime", "medal", "timeSpent", "mapper", "styles", "skipType",
+    "atTime", "finalTime", "currentMedalCount", "freeSkipCount", "pbBeforeFin", "mapTitle",
+    "currentGoldCount"
+]
 
+# dtypes of the typed ingest. All times and counts fit in 32 bits.
+category_fields = ["player", "medal", "skipType", "mapper", "styles"]
+csv_dtypes = {name: 'int32' for name in int_fields}
+csv_dtypes.update({name: 'category' for name in category_fields})
+csv_dtypes.update({"datetime": str, "mapTitle": str})
+
+def chunked(entries, size):
+    entries = iter(entries)
+    while chunk := list(itertools.islice(entries, size)):
+        yield chunk
+
+def write_json(entries, output_file, chunk_rows):
+    # Compact, one run per line, written a chunk at a time.
+    count = 0
     with open(output_file, 'w', encoding='utf-8') as json_file:
-        json.dump(data, json_file, indent=4)
+        json_file.write('[')
+        for chunk in chunked(entries, chunk_rows):
+            lines = [json.dumps(entry, ensure_ascii=False, separators=(',', ':')) for entry in chunk]
+            json_file.write(',' if count else '')
+            json_file.write('\n' + ',\n'.join(lines))
+            count += len(chunk)
+        json_file.write('\n]\n')
+    return count
+
+def write_parquet(entries, output_file, chunk_rows):
+    # Each chunk becomes a row group, so memory is bounded by chunk_rows.
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        sys.exit("Parquet output needs pyarrow: pip install pyarrow")
+    schema = pa.schema([(name, pa.int64() if name in int_fields else pa.string()) for name in fields])
+    count = 0
+    with pq.ParquetWriter(output_file, schema) as writer:
+        for chunk in chunked(entries, chunk_rows):
+            writer.write_table(pa.Table.from_pylist(chunk, schema=schema))
+            count += len(chunk)
+    return count
+
+def csv_header(input_file):
+    with open(input_file, 'r', encoding='utf-8', newline='') as f:
+        return next(csv.reader(f, delimiter=';'), [])
+
+def byte_ranges(input_file, parts):
+    # Splits the rows after the header into `parts` ranges that start and
+    # end on line breaks. Map titles with a line break in them would be cut
+    # in two, so the tracker's CSVs must not have any.
+    with open(input_file, 'rb') as f:
+        f.readline()
+        start = f.tell()
+        size = f.seek(0, 2)
+        bounds = [start]
+        for i in range(1, parts):
+            f.seek(max(start + (size - start) * i // parts, bounds[-1]))
+            f.readline()
+            bounds.append(f.tell())
+    bounds.append(size)
+    return [(a, b) for a, b in zip(bounds, bounds[1:]) if b > a]
+
+def chunk_ranges(input_file, chunk_rows):
+    # Byte ranges of about chunk_rows rows each, from the length of the
+    # first rows.
+    with open(input_file, 'rb') as f:
+        f.readline()
+        start = f.tell()
+        sample = f.read(1 << 16)
+        size = f.seek(0, 2)
+    row_bytes = max(1, len(sample) / max(1, sample.count(b'\n')))
+    return byte_ranges(input_file, max(1, int((size - start) / (row_bytes * chunk_rows)) + 1))
+
+def read_range(input_file, start, end, dtypes=csv_dtypes, parse_dates=True):
+    import pandas as pd
+    if end <= start:
+        df = pd.DataFrame({name: pd.Series([], dtype=dtypes[name]) for name in fields})
+    else:
+        with open(input_file, 'rb') as f:
+            f.seek(start)
+            data = f.read(end - start)
+        # Empty fields stay empty strings, as the csv module reads them.
+        df = pd.read_csv(io.BytesIO(data), sep=';', header=None, names=csv_header(input_file),
+                         usecols=fields, dtype=dtypes, keep_default_na=False)[fields]
+    if parse_dates:
+        df["datetime"] = pd.to_datetime(df["datetime"], format='ISO8601', utc=True)
+    return df
+
+# Times and counts of the JSON are written as read, so none are narrowed.
+entry_dtypes = dict(csv_dtypes, **{name: 'int64' for name in int_fields})
+
+def range_entries(input_file, start, end):
+    # The rows of one byte range as export entries, converted a column at a
+    # time: the datetime keeps its seconds and gets a Z, as the tracker's
+    # export has it.
+    df = read_range(input_file, start, end, entry_dtypes, parse_dates=False)
+    columns = []
+    for name in fields:
+        column = df[name]
+        if name == "datetime":
+            column = column.str.replace(' ', 'T', regex=False).str.split('.').str[0] + 'Z'
+        columns.append(column.astype(object).tolist() if name not in int_fields else column.tolist())
+    return [dict(zip(fields, row)) for row in zip(*columns)]
+
+def read_entries(input_file, chunk_rows=50000, jobs=1):
+    # The CSV's runs a byte range at a time, so it is never held in memory.
+    # With jobs > 1 the ranges are parsed in that many processes, with at
+    # most one range per process waiting to be written.
+    ranges = chunk_ranges(input_file, chunk_rows)
+    if jobs <= 1:
+        for start, end in ranges:
+            yield from range_entries(input_file, start, end)
+        return
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        pending = deque()
+        for start, end in ranges:
+            pending.append(pool.submit(range_entries, input_file, start, end))
+            if len(pending) > jobs:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+def read_frame(input_file, jobs=1):
+    # The whole CSV as a typed DataFrame, parsed column by column by pandas.
+    # With jobs > 1 each process parses one byte range.
+    import pandas as pd
+    from pandas.api.types import union_categoricals
+    ranges = byte_ranges(input_file, jobs)
+    if len(ranges) <= 1:
+        return read_range(input_file, *(ranges or [(0, 0)])[0])
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        parts = list(pool.map(read_range, itertools.repeat(input_file), *zip(*ranges)))
+    # Each part has its own categories; merge them instead of falling back
+    # to object columns as pd.concat would.
+    data = {}
+    for name in fields:
+        if name in category_fields:
+            data[name] = union_categoricals([part[name] for part in parts])
+        else:
+            data[name] = pd.concat([part[name] for part in parts], ignore_index=True)
+    return pd.DataFrame(data)
+
+def memory_report(input_file, jobs=1):
+    # Bytes per column of the typed frame next to the frame built from the
+    # converted rows, which is what loading the JSON gives today.
+    import pandas as pd
+    typed = read_frame(input_file, jobs).memory_usage(index=False, deep=True)
+    plain = pd.DataFrame(list(read_entries(input_file)), columns=fields).memory_usage(index=False, deep=True)
+    print(f"{'column':20s} {'typed':>12s} {'today':>12s}")
+    for name in fields:
+        print(f"{name:20s} {typed[name]:>12,} {plain[name]:>12,}")
+    print(f"{'total':20s} {typed.sum():>12,} {plain.sum():>12,}  ({plain.sum() / max(1, typed.sum()):.1f}x smaller)")
+
+writers = {
+    'json': write_json,
+    'parquet': write_parquet,
+}
+
+def csv_to_json(input_file, output_file, output_format=None, chunk_rows=50000, jobs=1):
+    if output_format is None:
+        output_format = 'parquet' if output_file.endswith('.parquet') else 'json'
+    return writers[output_format](read_entries(input_file, chunk_rows, jobs), output_file, chunk_rows)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert the tracker's semicolon CSV to an export JSON or Parquet file.")
+    parser.add_argument("input_file", nargs='?', default='random_maps.csv', help="Path to the CSV file.")
+    parser.add_argument("output_file", nargs='?', default='export.json', help="Path of the file to write.")
+    parser.add_argument("--format", choices=list(writers), help="Output format; by default taken from the output file's extension.")
+    parser.add_argument("--chunk-rows", type=int, default=50000, help="Rows converted and written at a time.")
+    parser.add_argument("--memory-report", action='store_true', help="Only load the CSV as a typed table and compare its memory use.")
+    parser.add_argument("--jobs", type=int, default=1, help="Processes parsing the CSV.")
+
+    args = parser.parse_args()
+
+    if args.memory_report:
+        memory_report(args.input_file, args.jobs)
+        sys.exit()
 
-input_file = 'random_maps.csv'
-output_file = 'export.json'
-csv_to_json(input_file, output_file)
+    count = csv_to_json(args.input_file, args.output_file, args.format, args.chunk_rows, args.jobs)
+    print(f"Wrote {count} runs to {args.output_file}")
@@ -0,0 +1,187 @@
+import sys
+import json
+import heapq
+import random
+import argparse
+import itertools
+from functools import lru_cache
+from datetime import datetime, timezone
+
+# Style tags with how often they show up in the real export.
+style_weights = {
+    'LOL': 626, 'Mini': 542, 'Tech': 303, 'Race': 302, 'Dirt': 286, 'Mixed': 282, 'Ice': 224,
+    'Plastic': 155, 'Altered Nadeo': 155, 'Scenery': 151, 'Grass': 139, 'Reactor': 139,
+    'Transitional': 129, 'Stunt': 127, 'FullSpeed': 126, 'Competitive': 117, 'Water': 98,
+    'SnowCar': 93, 'Bobsleigh': 92, 'SpeedFun': 77, 'Wood': 69, 'SpeedTech': 61, 'Remake': 59,
+    'Signature': 54, 'RallyCar': 51, 'Platform': 48, 'MultiLap': 47, 'Sausage': 47,
+    'SpeedMapping': 47, 'RPG': 40, 'DesertCar': 34, 'Trial': 31, 'EngineOff': 27, 'Obstacle': 27,
+    'Freestyle': 26, 'Backwards': 23, 'SpeedDrift': 23, 'Educational': 22, 'Nascar': 21,
+    'Pathfinding': 20, 'Bumper': 19, 'Puzzle': 19, 'Press Forward': 18, 'ZrT': 17,
+    'Underwater': 14, 'Offroad': 14, 'Bugslide': 13, 'MixedCar': 13, 'Minigame': 12, 'Fragile': 10,
+}
+style_names = list(style_weights)
+style_cum = list(itertools.accumulate(style_weights.values()))
+# Share of maps with 1, 2 and 3 style tags.
+style_counts = (1, 2, 3)
+style_count_weights = (43, 31, 26)
+
+medals = ('at', 'gold', 'skip')
+medal_weights = (71, 23, 6)
+skip_types = ('freeskip', 'brokenskip', 'forceSwitch')
+skip_type_weights = (54, 29, 17)
+
+# Lognormal (median ms, sigma) fitted to the real export.
+at_time = (29000, 0.73)
+time_spent = {'at': (71000, 0.86), 'gold': (102000, 0.78), 'skip': (29000, 1.78)}
+at_margin = (566, 1.9)
+gold_margin = (1214, 0.92)
+pb_margin = {'at': (871, 1.7), 'gold': (1970, 1.6)}
+pb_share = {'at': 0.44, 'gold': 0.57, 'skip': 0.41}
+skip_final_share = 0.07
+
+title_words = (
+    'Winter', 'Summer', 'Spring', 'Fall', 'Storm', 'Glory', 'Dunk', 'Flatland', 'Mostly', 'Dirt',
+    'Half', 'Piper', 'Icebound', 'Rush', 'Wet', 'Plastic', 'Quick', 'Sausage', 'Tap', 'Gas',
+    'Touch', 'Grass', 'Bell', 'Loop', 'Drift', 'Canyon', 'Valley', 'Stadium', 'Neon', 'Jump',
+)
+name_parts = ('Ar', 'Bar', 'Dam', 'Eric', 'Fab', 'Kir', 'Lu', 'Max', 'Nox', 'Ryu', 'Sky', 'Tel', 'Vex', 'Zed')
+
+day_ms = 24 * 60 * 60 * 1000
+hour_ms = 60 * 60 * 1000
+
+def lognormal(rng, median_sigma):
+    median, sigma = median_sigma
+    return int(rng.lognormvariate(0, sigma) * median)
+
+def pick_styles(rng):
+    n = rng.choices(style_counts, style_count_weights)[0]
+    tags = []
+    while len(tags) < n:
+        tag = rng.choices(style_names, cum_weights=style_cum)[0]
+        if tag not in tags:
+            tags.append(tag)
+    return ''.join(tag + ',' for tag in tags)
+
+# Map ids are drawn from 1..map_count, so the cache below stops growing
+# once every map has come up.
+map_count = 221117
+
+@lru_cache(maxsize=None)
+def map_info(seed, map_id):
+    # Title, mapper and styles only depend on the map id, so a map that
+    # comes up twice looks the same both times.
+    rng = random.Random(seed << 20 | map_id)
+    words = rng.sample(title_words, rng.randint(1, 3))
+    title = ' '.join(words) + (f" {rng.randint(1, 30):02d}" if rng.random() < 0.5 else '')
+    mapper = ''.join(rng.sample(name_parts, 2)) + (str(rng.randint(1, 99)) if rng.random() < 0.4 else '')
+    return title, mapper, pick_styles(rng)
+
+def format_datetime(ms):
+    dt = datetime.fromtimestamp(ms // 1000, tz=timezone.utc)
+    return dt.strftime('%Y-%m-%dT%H:%M:%S') + f".{ms % 1000:03d}Z"
+
+def player_runs(seed, player, start_ms, days, runs_per_day):
+    # One player's runs in time order: a session a day starting in the
+    # afternoon or evening, each run starting a few seconds after the last.
+    rng = random.Random(f"{seed}-{player}")
+    session_hour = rng.uniform(14, 20)
+    medal_count = 0
+    gold_count = -1
+    free_skips = 4
+    t = start_ms
+    for day in range(days):
+        runs = int(runs_per_day * rng.uniform(0.8, 1.2))
+        if rng.random() < 0.08:
+            runs //= 10
+        # Very long sessions run into the next day's instead of overlapping it.
+        t = max(t, start_ms + day * day_ms + int((session_hour + rng.gauss(0, 1)) * hour_ms))
+        for _ in range(runs):
+            medal = rng.choices(medals, medal_weights)[0]
+            skip_type = 'noskip'
+            if medal == 'skip':
+                skip_type = rng.choices(skip_types, skip_type_weights)[0]
+                if skip_type == 'freeskip':
+                    if free_skips == 0:
+                        skip_type = 'forceSwitch'
+                    else:
+                        free_skips -= 1
+            at = max(1000, lognormal(rng, at_time))
+            if medal == 'at':
+                final = max(at // 2, at - lognormal(rng, at_margin))
+                medal_count += 1
+                # A free skip is earned back now and then.
+                if medal_count % 25 == 0:
+                    free_skips += 1
+            elif medal == 'gold':
+                final = at + 1 + lognormal(rng, gold_margin)
+                gold_count = max(gold_count, 0) + 1
+            else:
+                final = at + lognormal(rng, (38000, 0.9)) if rng.random() < skip_final_share else -1
+            if rng.random() < pb_share[medal]:
+                pb = final + lognormal(rng, pb_margin[medal]) if medal != 'skip' else int(at * rng.uniform(0.7, 1.5))
+            else:
+                pb = -1
+            spent = lognormal(rng, time_spent[medal])
+            t += spent + int(rng.uniform(2000, 10000))
+            map_id = rng.randint(1, map_count)
+            title, mapper, styles = map_info(seed, map_id)
+            yield t, {
+                "mapId": map_id,
+                "player": player,
+                "datetime": format_datetime(t),
+                "medal": medal,
+                "timeSpent": spent,
+                "mapper": mapper,
+                "styles": styles,
+                "skipType": skip_type,
+                "atTime": at,
+                "finalTime": final,
+                "currentMedalCount": medal_count,
+                "freeSkipCount": free_skips,
+                "pbBeforeFin": pb,
+                "mapTitle": title,
+                "currentGoldCount": gold_count,
+            }
+
+def generate_runs(players, days, runs_per_day, start='2025-01-08', seed=0):
+    # Merges the players' runs by time and numbers them like the tracker
+    # does, with an occasional gap. Holds one pending run per player.
+    start_ms = int(datetime.fromisoformat(start).replace(tzinfo=timezone.utc).timestamp() * 1000)
+    streams = [player_runs(seed, p, start_ms, days, runs_per_day) for p in players]
+    rng = random.Random(f"{seed}-ids")
+    run_id = 61
+    for _, run in heapq.merge(*streams, key=lambda item: item[0]):
+        run_id += 1 if rng.random() < 0.97 else rng.randint(2, 4)
+        yield {"id": run_id, **run}
+
+def write_export(runs, out):
+    # Written one run per line as it is generated, so the file can be far
+    # larger than memory. Returns the number of runs written.
+    count = 0
+    out.write('[')
+    for run in runs:
+        out.write(',\n' if count else '\n')
+        out.write(json.dumps(run, ensure_ascii=False))
+        count += 1
+    out.write('\n]\n')
+    return count
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write a synthetic export.json with realistic runs for load testing.")
+    parser.add_argument("output", help="Path of the JSON file to write, or - for stdout.")
+    parser.add_argument("--players", nargs='+', default=['Larstm', 'Scrapie98'],
+                        help="Player names; add them to data/states.py to plot them as streamers.")
+    parser.add_argument("--days", type=int, default=13)
+    parser.add_argument("--runs", type=int, default=110, help="Average runs per player per day.")
+    parser.add_argument("--start", default='2025-01-08', help="First day, YYYY-MM-DD.")
+    parser.add_argument("--seed", type=int, default=0)
+
+    args = parser.parse_args()
+
+    runs = generate_runs(args.players, args.days, args.runs, args.start, args.seed)
+    if args.output == '-':
+        write_export(runs, sys.stdout)
+    else:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            count = write_export(runs, f)
+        print(f"Wrote {count} runs to {args.output}")
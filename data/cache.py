@@ -0,0 +1,261 @@
+import io
+import os
+import json
+import hashlib
+import numpy as np
+import pandas as pd
+
+data_dir = os.path.dirname(os.path.abspath(__file__))
+export_file = os.path.join(data_dir, 'export.json')
+
+# Bump when the layout of the .npz changes so old caches get rebuilt.
+cache_version = 3
+# Runs appended to the export go to numbered segment files next to the
+# cache; past this many they are merged back into the main file.
+max_segments = 8
+# Read size when hashing the export up to the append point.
+block_size = 1 << 20
+
+int_columns = [
+    'id', 'mapId', 'timeSpent', 'atTime', 'finalTime', 'currentMedalCount',
+    'freeSkipCount', 'pbBeforeFin', 'currentGoldCount'
+]
+category_columns = ['player', 'medal', 'skipType', 'mapper']
+text_columns = ['styles', 'mapTitle']
+# Kept from the last file of the store instead of concatenated.
+meta_keys = ['columns', 'stamp', 'generation', 'watermark', 'digest', 'start']
+
+def cache_path(source):
+    return os.path.splitext(source)[0] + '.cache.npz'
+
+def segment_path(source, n):
+    return os.path.splitext(source)[0] + f'.cache.{n}.npz'
+
+def source_stamp(source):
+    st = os.stat(source)
+    return np.array([cache_version, st.st_mtime_ns, st.st_size], dtype=np.int64)
+
+def column_arrays(df, col, known=None):
+    # For text columns, `known` is the value list of the runs already
+    # stored: new values are numbered after it and only they are returned.
+    if col == 'datetime':
+        ts = pd.to_datetime(df[col], utc=True)
+        return {col: ts.dt.as_unit('ms').astype('int64').to_numpy()}
+    if col in int_columns:
+        return {col: df[col].fillna(-1).to_numpy(dtype=np.int64)}
+    values = df[col].fillna('').astype(str)
+    if known is None:
+        codes, uniques = pd.factorize(values)
+    else:
+        codes = pd.Index(known).get_indexer(values)
+        unseen = codes < 0
+        new_codes, uniques = pd.factorize(values[unseen])
+        codes[unseen] = len(known) + new_codes
+    return {col + '.codes': codes.astype(np.int32), col + '.values': np.array(list(uniques), dtype=str)}
+
+def arrays_from_frame(df, known=None):
+    arrays = {'columns': np.array(list(df.columns), dtype=str)}
+    for col in df.columns:
+        arrays.update(column_arrays(df, col, None if known is None else known.get(col + '.values')))
+    return arrays
+
+def frame_from_arrays(arrays, start=0):
+    # The runs from row `start` on, with categories over all stored values.
+    data = {}
+    for col in arrays['columns']:
+        col = str(col)
+        if col == 'datetime':
+            data[col] = pd.to_datetime(arrays['datetime'][start:], unit='ms', utc=True)
+        elif col + '.codes' in arrays:
+            codes = arrays[col + '.codes'][start:]
+            values = arrays[col + '.values'].astype(object)
+            if col in category_columns:
+                data[col] = pd.Categorical.from_codes(codes, categories=values)
+            else:
+                data[col] = values[codes]
+        else:
+            data[col] = arrays[col][start:]
+    df = pd.DataFrame(data, index=pd.RangeIndex(start, len(arrays['id'])))
+    df.attrs['generation'] = int(arrays['generation'][0])
+    return df
+
+def write_cache(target, arrays):
+    tmp = target + '.tmp'
+    try:
+        with open(tmp, 'wb') as f:
+            np.savez(f, **arrays)
+        os.replace(tmp, target)
+    except OSError:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+def read_npz(target):
+    if not os.path.exists(target):
+        return None
+    try:
+        with np.load(target) as npz:
+            return {k: npz[k] for k in npz.files}
+    except (OSError, ValueError, KeyError):
+        return None
+
+def remove_segments(source):
+    n = 1
+    while os.path.exists(segment_path(source, n)):
+        os.remove(segment_path(source, n))
+        n += 1
+
+def read_store(source):
+    # The main cache and the segments written after it, as one set of
+    # arrays. A segment left over from an older cache is not used.
+    arrays = read_npz(cache_path(source))
+    if arrays is None or 'generation' not in arrays or arrays['stamp'][0] != cache_version:
+        return None
+    arrays['segments'] = 0
+    while True:
+        segment = read_npz(segment_path(source, arrays['segments'] + 1))
+        if (segment is None or segment['generation'][0] != arrays['generation'][0]
+                or segment['start'][0] != len(arrays['id'])):
+            return arrays
+        for key, value in segment.items():
+            if key in meta_keys:
+                arrays[key] = value
+            else:
+                arrays[key] = np.concatenate((arrays[key], value))
+        arrays['segments'] += 1
+
+def hash_to(f, end, digest):
+    # Adds the bytes from the current position up to `end` to `digest`.
+    while f.tell() < end:
+        block = f.read(min(block_size, end - f.tell()))
+        if not block:
+            break
+        digest.update(block)
+    return digest
+
+def mark_end(source, arrays, size, digest=None, start=0):
+    # Where the next run would be appended (just past the last '}') and the
+    # newest run stored; watermark is [offset, last id, last datetime].
+    # digest is the sha1 of every byte before the offset; one that already
+    # covers the bytes before `start` is carried on from there.
+    with open(source, 'rb') as f:
+        f.seek(max(0, size - 4096))
+        end = f.read(size - f.tell())
+        last = end.rfind(b'}')
+        offset = size - len(end) + last + 1 if last >= 0 else -1
+        f.seek(start)
+        digest = hash_to(f, offset, digest or hashlib.sha1())
+    ids = arrays['id']
+    arrays['watermark'] = np.array([
+        offset,
+        ids.max() if len(ids) else -1,
+        arrays['datetime'].max() if len(ids) else -1,
+    ], dtype=np.int64)
+    arrays['digest'] = np.frombuffer(digest.digest(), dtype=np.uint8)
+
+def read_appended(source, arrays, size):
+    # The runs written after the append point and the digest up to it, or
+    # None unless the export grew and every byte before that point is
+    # still the one stored.
+    offset = int(arrays['watermark'][0])
+    if offset < 0 or size <= int(arrays['stamp'][2]):
+        return None
+    with open(source, 'rb') as f:
+        digest = hash_to(f, offset, hashlib.sha1())
+        if f.tell() != offset or digest.digest() != arrays['digest'].tobytes():
+            return None
+        text = f.read(size - offset).decode('utf-8')
+    decoder = json.JSONDecoder()
+    entries = []
+    pos = 0
+    while pos < len(text) and text[pos].isspace():
+        pos += 1
+    if pos == len(text) or text[pos] not in ',]':
+        return None
+    while True:
+        while pos < len(text) and text[pos] in ' \t\r\n,':
+            pos += 1
+        if pos == len(text):
+            return None
+        if text[pos] == ']':
+            return entries, digest
+        try:
+            entry, pos = decoder.raw_decode(text, pos)
+        except json.JSONDecodeError:
+            return None
+        entries.append(entry)
+
+def append_to_store(source, arrays, stamp):
+    # Only the appended runs are parsed; they become a new segment. The
+    # trackers' ids are not in order, so a run exported again is found by
+    # id; the stored one may be out of date, so the store is rebuilt.
+    appended = read_appended(source, arrays, int(stamp[2]))
+    if appended is None:
+        return None
+    entries, digest = appended
+    columns = [str(c) for c in arrays['columns']]
+    if any(set(e) != set(columns) for e in entries):
+        return None
+    new = pd.DataFrame(entries, columns=columns)
+    ids = new['id'].to_numpy(dtype=np.int64)
+    if np.isin(ids, arrays['id']).any() or len(np.unique(ids)) < len(ids):
+        return None
+    segment = arrays_from_frame(new, arrays)
+    segment['start'] = np.array([len(arrays['id'])], dtype=np.int64)
+    for key, value in segment.items():
+        if key not in meta_keys:
+            arrays[key] = np.concatenate((arrays[key], value))
+    arrays['stamp'] = segment['stamp'] = stamp
+    mark_end(source, arrays, int(stamp[2]), digest, int(arrays['watermark'][0]))
+    segment['watermark'] = arrays['watermark']
+    segment['digest'] = arrays['digest']
+    segment['generation'] = arrays['generation']
+    segment['columns'] = arrays['columns']
+    arrays['segments'] += 1
+    if arrays['segments'] > max_segments:
+        write_full(source, arrays, new_generation=False)
+    else:
+        write_cache(segment_path(source, arrays['segments']), segment)
+    return arrays
+
+def write_full(source, arrays, new_generation=True):
+    # Rebuilt from scratch, the runs get a new generation so processes
+    # holding the old ones reload; merged segments keep theirs.
+    if new_generation:
+        arrays['generation'] = np.array([int.from_bytes(os.urandom(7), 'little')], dtype=np.int64)
+    arrays['segments'] = 0
+    remove_segments(source)
+    write_cache(cache_path(source), {k: v for k, v in arrays.items() if k != 'segments'})
+
+def build_store(source, stamp):
+    # Exactly the bytes the stamp describes, even if a run is being appended.
+    with open(source, 'rb') as f:
+        data = f.read(int(stamp[2]))
+    arrays = arrays_from_frame(pd.read_json(io.BytesIO(data), convert_dates=False))
+    arrays['stamp'] = stamp
+    mark_end(source, arrays, int(stamp[2]))
+    write_full(source, arrays)
+    return arrays
+
+def update_store(source):
+    # The stored runs, brought up to date with the export. The JSON is only
+    # parsed in full when there is no cache or the export was rewritten;
+    # runs appended to it are parsed on their own.
+    source = os.path.abspath(source)
+    stamp = source_stamp(source)
+    arrays = read_store(source)
+    if arrays is not None and not np.array_equal(arrays['stamp'], stamp):
+        arrays = append_to_store(source, arrays, stamp)
+    if arrays is None:
+        arrays = build_store(source, stamp)
+    return arrays
+
+def load_export(source=export_file):
+    return frame_from_arrays(update_store(source))
+
+def load_appended(source, rows, generation):
+    # The runs after the first `rows`, for a process that already holds
+    # those. None when the export was rewritten since they were loaded.
+    arrays = update_store(source)
+    if int(arrays['generation'][0]) != generation or len(arrays['id']) < rows:
+        return None
+    return frame_from_arrays(arrays, rows)
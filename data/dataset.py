@@ -0,0 +1,160 @@
+from functools import cached_property
+
+import numpy as np
+import pandas as pd
+
+from data.cache import load_export, load_appended, export_file
+from data.states import streamers, colors
+from data.styles import StyleIndex, StyleCube
+from data.stretches import timestamps_ms
+
+def day_column(df):
+    return df['datetime'].dt.date
+
+def diff_column(df):
+    return df['atTime'] - df['finalTime']
+
+def pb_diff_column(df):
+    return df['atTime'] - df['pbBeforeFin']
+
+def style_list_column(df):
+    return [[s.strip() for s in styles.split(',') if s.strip()] for styles in df['styles']]
+
+day_ms = 24 * 60 * 60 * 1000
+
+# Reverse of data.states.streamers, built once: player alias -> streamer.
+# An alias listed under two streamers belongs to the first.
+streamer_names = list(streamers)
+alias_streamer = {}
+for name, aliases in streamers.items():
+    for alias in aliases:
+        alias_streamer.setdefault(alias, name)
+
+# Streamers without an entry in data.states.colors get one of these in turn.
+fallback_colors = [(228, 26, 28), (152, 78, 163), (255, 127, 0), (166, 86, 40), (247, 129, 191), (77, 175, 74)]
+
+def streamer_color(name):
+    if name in colors:
+        return colors[name]
+    return fallback_colors[streamer_names.index(name) % len(fallback_colors)]
+
+def streamer_column(df):
+    # Each run's streamer as a categorical over streamer_names, NaN for
+    # players that are none of them. Looked up once per distinct player.
+    players = df['player'].astype('category').cat
+    codes = pd.Categorical(players.categories.map(alias_streamer.get), categories=streamer_names).codes
+    return pd.Categorical.from_codes(np.append(codes, -1)[players.codes], categories=streamer_names)
+
+def streamer_rows(df, names):
+    # Positions of the runs by any of the named streamers (one name or
+    # several), compared on the streamer column's codes.
+    if isinstance(names, str):
+        names = (names,)
+    codes = [streamer_names.index(name) for name in names]
+    return np.flatnonzero(np.isin(df['streamer'].cat.codes.to_numpy(), codes))
+
+derived_columns = {
+    'day': day_column,
+    'diff': diff_column,
+    'pb_diff': pb_diff_column,
+    'style_list': style_list_column,
+}
+
+class Dataset:
+    # Loads the export on first use and adds derived columns / per-streamer
+    # views only when something asks for them, so every script shares one
+    # copy of the work instead of rebuilding it on each launch or callback.
+    def __init__(self, source=export_file):
+        self.source = source
+        self.views = {}
+        # Called with the first new row after refresh() added runs, or with
+        # 0 when everything was loaded again.
+        self.on_append = []
+
+    @cached_property
+    def df(self):
+        df = load_export(self.source)
+        df['styles'] = df['styles'].fillna('')
+        df['streamer'] = streamer_column(df)
+        return df
+
+    @cached_property
+    def timestamps(self):
+        return timestamps_ms(self.df['datetime'])
+
+    @cached_property
+    def style_index(self):
+        return StyleIndex(self.df)
+
+    @cached_property
+    def style_cube(self):
+        cube = StyleCube(streamer_names)
+        cube.extend(self.style_index, self.df['streamer'].cat.codes.to_numpy(np.int64), self.timestamps // day_ms)
+        return cube
+
+    def require(self, *names):
+        for name in names:
+            if name in self.df.columns:
+                continue
+            values = derived_columns[name](self.df)
+            self.df[name] = values
+            for view in self.views.values():
+                view[name] = self.df.loc[view.index, name]
+        return self.df
+
+    def column(self, name):
+        return self.require(name)[name]
+
+    def streamer(self, name):
+        if name not in self.views:
+            self.views[name] = self.df[self.df['streamer'] == name].copy()
+        return self.views[name]
+
+    def reset(self):
+        for name in ('df', 'timestamps', 'style_index', 'style_cube'):
+            self.__dict__.pop(name, None)
+        self.views.clear()
+
+    def refresh(self):
+        # Adds the runs appended to the export since it was loaded and
+        # extends everything built from the runs with only those. A rewritten
+        # export is loaded again. Returns the number of new runs.
+        if 'df' not in self.__dict__:
+            return 0
+        df = self.df
+        new = load_appended(self.source, len(df), df.attrs.get('generation'))
+        if new is None:
+            self.reset()
+            for hook in self.on_append:
+                hook(0)
+            return len(self.df)
+        if len(new) == 0:
+            return 0
+        start = len(df)
+        new['styles'] = new['styles'].fillna('')
+        new['streamer'] = streamer_column(new)
+        for name in derived_columns:
+            if name in df.columns:
+                new[name] = derived_columns[name](new)
+        # New players or mappers extend the categories; the frames being
+        # appended to get the same ones so the columns stay categorical.
+        for frame in [df] + list(self.views.values()):
+            for col in frame.columns:
+                if isinstance(frame[col].dtype, pd.CategoricalDtype):
+                    frame[col] = frame[col].cat.set_categories(new[col].cat.categories)
+        generation = new.attrs['generation']
+        self.__dict__['df'] = df = pd.concat([df, new])
+        df.attrs['generation'] = generation
+        for name, view in self.views.items():
+            self.views[name] = pd.concat([view, new[new['streamer'] == name]])
+        if 'timestamps' in self.__dict__:
+            self.timestamps = np.concatenate((self.timestamps, timestamps_ms(new['datetime'])))
+        if 'style_index' in self.__dict__:
+            self.style_index.extend(new)
+        if 'style_cube' in self.__dict__:
+            self.style_cube.extend(self.style_index, new['streamer'].cat.codes.to_numpy(np.int64), timestamps_ms(new['datetime']) // day_ms)
+        for hook in self.on_append:
+            hook(start)
+        return len(new)
+
+dataset = Dataset()
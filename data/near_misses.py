@@ -0,0 +1,137 @@
+import numpy as np
+
+from data.dataset import dataset, diff_column, pb_diff_column, streamer_rows
+
+day_ms = 24 * 60 * 60 * 1000
+
+class NearMissIndex:
+    # Rows with a non-negative margin, presorted by margin, so every threshold
+    # is a prefix found with searchsorted. The same rows are also kept in
+    # datetime order together with their margin rank, which turns "the prefix
+    # in datetime order" into a single mask instead of a re-sort.
+    def __init__(self, diff, timestamps, rows):
+        keep = diff >= 0
+        diff, timestamps, rows = diff[keep], timestamps[keep], rows[keep]
+        by_diff = np.argsort(diff, kind='stable')
+        by_time = np.argsort(timestamps, kind='stable')
+        rank = np.empty(len(by_diff), dtype=np.int64)
+        rank[by_diff] = np.arange(len(by_diff))
+        self.diff = diff[by_diff]
+        self.rows_by_diff = rows[by_diff]
+        self.days_by_diff = timestamps[by_diff] // day_ms
+        self.times_by_time = timestamps[by_time]
+        self.rows_by_time = rows[by_time]
+        self.rank_by_time = rank[by_time]
+        self.days_by_time = timestamps[by_time] // day_ms
+
+    def extend(self, diff, timestamps, rows):
+        # Merges rows appended to the dataset into both orders, giving the
+        # same arrays as building the index over all rows again. New rows go
+        # after old ones with an equal margin or time, as the stable sorts do.
+        keep = diff >= 0
+        diff, timestamps, rows = diff[keep], timestamps[keep], rows[keep]
+        if len(diff) == 0:
+            return
+        by_diff = np.argsort(diff, kind='stable')
+        at = np.searchsorted(self.diff, diff[by_diff], side='right')
+        rank = np.empty(len(diff), dtype=np.int64)
+        rank[by_diff] = at + np.arange(len(at))
+        self.rank_by_time = self.rank_by_time + np.searchsorted(at, self.rank_by_time, side='right')
+        self.diff = np.insert(self.diff, at, diff[by_diff])
+        self.rows_by_diff = np.insert(self.rows_by_diff, at, rows[by_diff])
+        self.days_by_diff = np.insert(self.days_by_diff, at, timestamps[by_diff] // day_ms)
+        by_time = np.argsort(timestamps, kind='stable')
+        at = np.searchsorted(self.times_by_time, timestamps[by_time], side='right')
+        self.times_by_time = np.insert(self.times_by_time, at, timestamps[by_time])
+        self.rows_by_time = np.insert(self.rows_by_time, at, rows[by_time])
+        self.rank_by_time = np.insert(self.rank_by_time, at, rank[by_time])
+        self.days_by_time = np.insert(self.days_by_time, at, timestamps[by_time] // day_ms)
+
+    def count(self, threshold):
+        return int(np.searchsorted(self.diff, threshold, side='right'))
+
+    def select(self, threshold, order='Datetime'):
+        n = self.count(threshold)
+        if order == 'FinalTime':
+            return self.rows_by_diff[:n], self.days_by_diff[:n]
+        mask = self.rank_by_time < n
+        return self.rows_by_time[mask], self.days_by_time[mask]
+
+def day_groups(days):
+    # Midpoint bar position and label for each run of equal consecutive days.
+    if len(days) == 0:
+        return np.array([]), []
+    starts = np.concatenate(([0], np.flatnonzero(days[1:] != days[:-1]) + 1))
+    ends = np.concatenate((starts[1:], [len(days)])) - 1
+    labels = [str(np.datetime64(int(d), 'D')) for d in days[starts]]
+    return (starts + ends) / 2, labels
+
+# A margin analysis is a vectorized column expression plus its labels.
+# Adding one here makes it available to every near-miss chart.
+metrics = {
+    'diff': {
+        'expression': diff_column,
+        'ylabel': "Difference (ms)",
+        'title': "Got AT by less than {threshold}ms : {streamer}",
+        'max_threshold': 50,
+        'batch_thresholds': (1, 2, 3, 5, 10, 20, 30, 50),
+    },
+    'pb_diff': {
+        'expression': pb_diff_column,
+        'ylabel': "PB Difference to AT (ms)",
+        'title': "Near misses : {streamer}",
+        'max_threshold': 5000,
+        'batch_thresholds': (10, 50, 100, 250, 500, 1000, 2500, 5000),
+    },
+}
+
+class NearMissEngine:
+    # Computes each metric column once and keeps one NearMissIndex per
+    # (metric, streamers), all over the same loaded dataset. Streamers are
+    # one name or a tuple of names from the dataset's streamer column.
+    def __init__(self, dataset):
+        self.dataset = dataset
+        self.metric_values = {}
+        self.indexes = {}
+        dataset.on_append.append(self.extend)
+
+    def extend(self, start):
+        # Runs from row `start` on were added to the dataset (0: all of it
+        # was loaded again).
+        if start == 0:
+            self.metric_values.clear()
+            self.indexes.clear()
+            return
+        new = self.dataset.df.iloc[start:]
+        for metric, values in self.metric_values.items():
+            self.metric_values[metric] = np.concatenate((values, np.asarray(metrics[metric]['expression'](new))))
+        for (metric, names), index in self.indexes.items():
+            rows = start + streamer_rows(new, names)
+            index.extend(self.values(metric)[rows], self.dataset.timestamps[rows], rows)
+
+    def values(self, metric):
+        if metric not in self.metric_values:
+            self.metric_values[metric] = np.asarray(metrics[metric]['expression'](self.dataset.df))
+        return self.metric_values[metric]
+
+    def index(self, metric, names):
+        key = (metric, names)
+        if key not in self.indexes:
+            rows = streamer_rows(self.dataset.df, names)
+            self.indexes[key] = NearMissIndex(self.values(metric)[rows], self.dataset.timestamps[rows], rows)
+        return self.indexes[key]
+
+    def select(self, metric, names, threshold, order='Datetime'):
+        return self.index(metric, names).select(threshold, order)
+
+    def filter(self, metric, names, threshold, order='Datetime'):
+        rows, days = self.select(metric, names, threshold, order)
+        return self.dataset.df.iloc[rows], days
+
+engine = NearMissEngine(dataset)
+
+def filter_near_misses(threshold, names, order='Datetime'):
+    return engine.filter('diff', names, threshold, order)
+
+def filter_reverse_near_misses(threshold, names, order='Datetime'):
+    return engine.filter('pb_diff', names, threshold, order)
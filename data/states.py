@@ -1,6 +1,6 @@
 streamers = {
-    "Scrapie": [ "Scrapie98" ],
-    "Lars": [ "Larstm" ]
+    "Lars": [ "Larstm" ],
+    "Scrapie": [ "Scrapie98" ]
 }
 
 mappers = {
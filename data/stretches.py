@@ -0,0 +1,88 @@
+import bisect
+import heapq
+
+import numpy as np
+
+minute_ms = 60 * 1000
+
+def timestamps_ms(datetimes):
+    return datetimes.dt.as_unit('ms').astype('int64').to_numpy()
+
+def window_counts(ts, window_ms):
+    # For every run taken as the end of a window, the first run still inside
+    # it (ts >= end - window) and how many runs the window holds.
+    starts = np.searchsorted(ts, ts - window_ms, side='left')
+    return starts, np.arange(len(ts)) - starts + 1
+
+def best_window(ts, window_ms):
+    if len(ts) == 0:
+        return None
+    starts, counts = window_counts(ts, window_ms)
+    end = int(np.argmax(counts))
+    return int(starts[end]), end
+
+def best_count_curve(ts, max_minutes):
+    # curve[m - 1] is the most runs that fit in any m minute window. Instead
+    # of one search per length, find the tightest span holding k consecutive
+    # runs for every k up to the most any window holds; the curve is then a
+    # single searchsorted over it. That is one vectorized difference per k,
+    # O(n * max_count) in all, with max_count small for windows of minutes.
+    windows = np.arange(1, max_minutes + 1, dtype=np.int64) * minute_ms
+    if len(ts) == 0:
+        return np.zeros(len(windows), dtype=np.int64)
+    _, counts = window_counts(ts, windows[-1])
+    max_count = int(counts.max())
+    min_span = np.zeros(max_count, dtype=np.int64)
+    for k in range(2, max_count + 1):
+        min_span[k - 1] = (ts[k - 1:] - ts[:len(ts) - k + 1]).min()
+    return np.searchsorted(min_span, windows, side='right')
+
+def top_windows(ts, window_ms, k):
+    # The k best windows that share no runs, ranked by run count. Each run
+    # ends one candidate window; candidates come off a heap best first. One
+    # that overlaps a chosen window has its start moved past that window and
+    # goes back with its smaller count, so it is only taken while it is still
+    # the best. Chosen windows are kept in order of start for bisect.
+    if len(ts) == 0 or k <= 0 or window_ms < 0:
+        return []
+    starts, counts = window_counts(ts, window_ms)
+    # Only the best candidates go on the heap. The rest hold at most `floor`
+    # runs; if the search gets down to that, it starts over with more.
+    size = min(len(ts), 16 * k)
+    while True:
+        if size < len(ts):
+            ends = np.argpartition(-counts, size)
+            floor = int(counts[ends[size]])
+            ends = ends[:size]
+        else:
+            ends = np.arange(len(ts))
+            floor = -1
+        picked = select_windows(starts[ends], counts[ends], ends, k, floor)
+        if picked is not None or size == len(ts):
+            return picked or []
+        size = min(len(ts), size * 4)
+
+def select_windows(starts, counts, ends, k, floor):
+    heap = list(zip((-counts).tolist(), ends.tolist(), starts.tolist()))
+    heapq.heapify(heap)
+    chosen_starts = []
+    chosen_ends = []
+    picked = []
+    while heap and len(picked) < k:
+        count, end, start = heapq.heappop(heap)
+        if -count <= floor:
+            return None
+        i = bisect.bisect_right(chosen_starts, end) - 1
+        if i >= 0:
+            if chosen_ends[i] >= end:
+                continue
+            if chosen_ends[i] >= start:
+                start = chosen_ends[i] + 1
+                heapq.heappush(heap, (start - end - 1, end, start))
+                continue
+        chosen_starts.insert(i + 1, start)
+        chosen_ends.insert(i + 1, end)
+        picked.append((start, end))
+    if len(picked) < k and floor >= 0:
+        return None
+    return picked
@@ -0,0 +1,234 @@
+from functools import cached_property
+
+import numpy as np
+import pandas as pd
+
+def bits_words(n_styles):
+    return max(1, (n_styles + 63) // 64)
+
+def pack_bits(rows, codes, n_rows, words):
+    # One bit per style and row, packed into 64 bit words.
+    bits = np.zeros((n_rows, words), dtype=np.uint64)
+    np.bitwise_or.at(bits, (rows, codes // 64), np.left_shift(np.uint64(1), (codes % 64).astype(np.uint64)))
+    return bits
+
+class StyleIndex:
+    # Tokenizes the comma separated 'styles' column once into an exploded
+    # (row, style code) table. Every count afterwards is a bincount over the
+    # selected rows, optionally weighted by a medal filter or a numeric column.
+    def __init__(self, df):
+        self.n_rows = 0
+        self.index = df.index[:0]
+        self.rows = np.zeros(0, dtype=np.int64)
+        self.codes = np.zeros(0, dtype=np.int32)
+        self.name_codes = {}
+        self.medal = df['medal'].to_numpy()[:0]
+        self.columns = {'freeSkipCount': df['freeSkipCount'].to_numpy()[:0]}
+        self.medal_masks = {}
+        self.extend(df)
+
+    def extend(self, df):
+        # Adds rows numbered after the ones already indexed. New styles get
+        # the next codes, so the result is the same as indexing all at once.
+        # Only the distinct style strings are split in Python; rows are then
+        # expanded from their combination code with repeat/cumsum.
+        combo_codes, combos = pd.factorize(df['styles'].fillna(''))
+        names = self.name_codes
+        combo_tokens = []
+        for combo in combos:
+            combo_tokens.append([names.setdefault(s.strip(), len(names)) for s in combo.split(',') if s.strip()])
+        lengths = np.array([len(t) for t in combo_tokens], dtype=np.int64)
+        offsets = np.concatenate(([0], np.cumsum(lengths)))
+        flat = np.array([c for t in combo_tokens for c in t], dtype=np.int32)
+        row_lengths = lengths[combo_codes]
+        total = int(row_lengths.sum())
+        rows = np.repeat(np.arange(self.n_rows, self.n_rows + len(df), dtype=np.int64), row_lengths)
+        row_starts = np.cumsum(row_lengths) - row_lengths
+        within = np.arange(total, dtype=np.int64) - np.repeat(row_starts, row_lengths)
+        codes = flat[np.repeat(offsets[combo_codes], row_lengths) + within]
+        first_row = self.n_rows
+        self.n_rows += len(df)
+        self.index = self.index.append(df.index)
+        self.rows = np.concatenate((self.rows, rows))
+        self.codes = np.concatenate((self.codes, codes))
+        self.names = np.array(list(names), dtype=object)
+        medal = df['medal'].to_numpy()
+        self.medal = np.concatenate((self.medal, medal))
+        for name in self.columns:
+            self.columns[name] = np.concatenate((self.columns[name], df[name].to_numpy()))
+        for name, mask in self.medal_masks.items():
+            self.medal_masks[name] = np.concatenate((mask, np.asarray(medal == name)))
+        if 'row_bits' in self.__dict__:
+            old = self.row_bits
+            bits = pack_bits(rows - first_row, codes, len(df), max(old.shape[1], bits_words(len(self.names))))
+            if bits.shape[1] > old.shape[1]:
+                old = np.pad(old, ((0, 0), (0, bits.shape[1] - old.shape[1])))
+            self.row_bits = np.concatenate((old, bits))
+
+    @cached_property
+    def row_bits(self):
+        return pack_bits(self.rows, self.codes, self.n_rows, bits_words(len(self.names)))
+
+    def style_bits(self, styles):
+        bits = np.zeros(self.row_bits.shape[1], dtype=np.uint64)
+        for style in styles:
+            code = self.name_codes.get(style)
+            if code is not None:
+                bits[code // 64] |= np.uint64(1) << np.uint64(code % 64)
+        return bits
+
+    def contains_any(self, styles, rows=None):
+        row_bits = self.row_bits if rows is None else self.row_bits[rows]
+        return (row_bits & self.style_bits(styles)).any(axis=1)
+
+    def positions(self, index):
+        return self.index.get_indexer(index)
+
+    def medal_mask(self, medal):
+        if medal not in self.medal_masks:
+            self.medal_masks[medal] = np.asarray(self.medal == medal)
+        return self.medal_masks[medal]
+
+    def select(self, rows=None):
+        if rows is None:
+            return np.ones(len(self.rows), dtype=bool)
+        mask = np.zeros(self.n_rows, dtype=bool)
+        mask[rows] = True
+        return mask[self.rows]
+
+    def counts(self, rows=None, medal=None, weight=None):
+        keep = self.select(rows)
+        if medal is not None:
+            keep &= self.medal_mask(medal)[self.rows]
+        token_rows = self.rows[keep]
+        codes = self.codes[keep]
+        if len(codes) == 0:
+            return {}
+        weights = None if weight is None else self.columns[weight][token_rows]
+        sums = np.bincount(codes, weights=weights, minlength=len(self.names))
+        # Keep dict order by first appearance in the selection, like the
+        # Counter based loops this replaces, so ties sort the same way.
+        first = np.full(len(self.names), len(codes), dtype=np.int64)
+        np.minimum.at(first, codes, np.arange(len(codes)))
+        present = np.flatnonzero(first < len(codes))
+        present = present[np.argsort(first[present], kind='stable')]
+        return {self.names[c]: int(sums[c]) for c in present}
+
+def mode_filters(mode):
+    if mode == 'Most':
+        return {}
+    if mode == 'Worst [skips]':
+        return {'weight': 'freeSkipCount'}
+    if mode.startswith('Best'):
+        return {'medal': 'gold' if 'gold' in mode else 'at'}
+    return None
+
+def group_small_styles(counts, cutoff):
+    total = sum(counts.values())
+    new_counts = {}
+    other_total = 0
+    for k, v in counts.items():
+        ratio = v / total if total > 0 else 0
+        if ratio < cutoff:
+            other_total += v
+        else:
+            new_counts[k] = v
+    return new_counts, other_total
+
+def style_level(index, rows, mode, cutoff):
+    # One drill-down level: the counts of the styles above the cutoff, the
+    # rest as 'other', and the rows without any shown style that the next
+    # level is made of (None when there is nothing left to drill into).
+    filters = mode_filters(mode)
+    counts = {} if filters is None else index.counts(rows, **filters)
+    grouped_counts, other = group_small_styles(counts, cutoff)
+    next_rows = None
+    if other > 0 and grouped_counts:
+        next_rows = rows[~index.contains_any(grouped_counts.keys(), rows)]
+        if len(next_rows) == 0:
+            next_rows = None
+    return grouped_counts, other, next_rows
+
+# Medal axis of StyleCube: 'at', 'gold', and every other medal in the last slot.
+cube_medals = ['at', 'gold']
+
+class StyleCube:
+    # Token counts and freeSkipCount sums per (streamer, day, medal, style),
+    # plus the first token of each cell so slices keep the dict order of
+    # StyleIndex.counts. A streamer's pie for one day, or for all of them,
+    # is then a sum over a few cells instead of a pass over the runs.
+    def __init__(self, streamers):
+        self.streamers = list(streamers)
+        self.n_rows = 0
+        self.n_tokens = 0
+        self.names = np.zeros(0, dtype=object)
+        self.days = np.zeros(0, dtype=np.int64)
+        shape = (len(self.streamers), 0, len(cube_medals) + 1, 0)
+        self.count = np.zeros(shape, dtype=np.int64)
+        self.skips = np.zeros(shape, dtype=np.int64)
+        self.first = np.zeros(shape, dtype=np.int64)
+
+    def extend(self, index, row_streamers, row_days):
+        # Adds the runs `index` got since the last call. row_streamers (a
+        # position in `streamers`, -1 for other players) and row_days (days
+        # since the epoch) cover only those runs.
+        start = self.n_tokens
+        rows = index.rows[start:]
+        codes = index.codes[start:]
+        streamer = row_streamers[rows - self.n_rows]
+        keep = streamer >= 0
+        tokens = np.flatnonzero(keep) + start
+        rows, codes, streamer = rows[keep], codes[keep], streamer[keep]
+        token_days = row_days[rows - self.n_rows]
+        self.n_rows = index.n_rows
+        self.n_tokens = len(index.rows)
+        self.names = index.names
+        self.grow(np.union1d(self.days, token_days), len(index.names))
+        medal = np.full(len(rows), len(cube_medals), dtype=np.int64)
+        for i, name in enumerate(cube_medals):
+            medal[index.medal_mask(name)[rows]] = i
+        n_streamers, n_days, n_medals, n_styles = self.count.shape
+        cells = ((streamer * n_days + np.searchsorted(self.days, token_days)) * n_medals + medal) * n_styles + codes
+        self.count += np.bincount(cells, minlength=self.count.size).reshape(self.count.shape)
+        skips = np.bincount(cells, weights=index.columns['freeSkipCount'][rows], minlength=self.count.size)
+        self.skips += skips.astype(np.int64).reshape(self.count.shape)
+        # Tokens come in order, so a cell seen before keeps its first token.
+        hit, first = np.unique(cells, return_index=True)
+        flat_first = self.first.reshape(-1)
+        flat_first[hit] = np.minimum(flat_first[hit], tokens[first])
+
+    def grow(self, days, n_styles):
+        # New days and styles get empty cells; existing cells keep their place
+        # relative to each other.
+        if len(days) == len(self.days) and n_styles == self.count.shape[3]:
+            return
+        at = np.searchsorted(days, self.days)
+        old_styles = self.count.shape[3]
+        for name in ('count', 'skips', 'first'):
+            old = getattr(self, name)
+            new = np.zeros((old.shape[0], len(days), old.shape[2], n_styles), dtype=np.int64)
+            if name == 'first':
+                new[:] = np.iinfo(np.int64).max
+            new[:, at, :, :old_styles] = old
+            setattr(self, name, new)
+        self.days = days
+
+    def counts(self, streamer, day=None, medal=None, weight=None):
+        # The same dict as StyleIndex.counts over the streamer's runs, on one
+        # day or all of them. medal can only be one of cube_medals and weight
+        # only 'freeSkipCount'.
+        s = self.streamers.index(streamer)
+        if day is None:
+            days = slice(None)
+        else:
+            d = np.searchsorted(self.days, day)
+            if d == len(self.days) or self.days[d] != day:
+                return {}
+            days = slice(d, d + 1)
+        medals = slice(None) if medal is None else [cube_medals.index(medal)]
+        count = self.count[s, days][:, medals].sum(axis=(0, 1))
+        values = count if weight is None else self.skips[s, days][:, medals].sum(axis=(0, 1))
+        first = self.first[s, days][:, medals].min(axis=(0, 1))
+        present = np.flatnonzero(count > 0)
+        present = present[np.argsort(first[present], kind='stable')]
+        return {self.names[c]: int(values[c]) for c in present}
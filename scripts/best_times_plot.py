@@ -3,57 +3,71 @@ import pandas as pd
 import matplotlib.pyplot as plt
 from matplotlib.widgets import RadioButtons, TextBox
 from matplotlib.ticker import FuncFormatter
-from datetime import timedelta
 
 current_dir = os.path.dirname(os.path.abspath(__file__))
 data_dir = os.path.join(current_dir, '..', 'data')
 sys.path.append(os.path.join(data_dir, '..'))
 
-from data.states import colors, streamers
+from data.dataset import dataset, streamer_names, streamer_color
+from data.stretches import timestamps_ms, best_window, best_count_curve, top_windows, minute_ms
 
-df = pd.read_json(os.path.join(data_dir, 'export.json'))
-df['datetime'] = pd.to_datetime(df['datetime'])
+df = dataset.df
 df_at = df[df['medal'] == 'at'].sort_values('datetime').reset_index(drop=True)
 
 mode = 'Single'
-active_streamer = 'Lars'
+active_streamer = streamer_names[0]
 duration = 10
+curve_minutes = 60
+top_k = 10
 
-def find_best_stretch(alias_list, dur):
-    tmp = df_at[df_at['player'].isin(alias_list)].copy()
-    if tmp.empty:
-        return tmp
-    tmp.reset_index(drop=True, inplace=True)
-    best_start = best_end = 0
-    best_count = 0
-    start_idx = 0
-    for end_idx in range(len(tmp)):
-        window_start = tmp.loc[end_idx, 'datetime'] - timedelta(minutes=dur)
-        while tmp.loc[start_idx, 'datetime'] < window_start:
-            start_idx += 1
-            if start_idx > end_idx:
-                break
-        count = end_idx - start_idx + 1
-        if count > best_count:
-            best_count = count
-            best_start, best_end = start_idx, end_idx
-    return tmp.loc[best_start:best_end]
-
-def overlay_data(st1, st2, dur):
-    d1 = find_best_stretch(streamers[st1], dur).copy()
-    d2 = find_best_stretch(streamers[st2], dur).copy()
-    if not d1.empty:
-        d1.reset_index(drop=True, inplace=True)
-        s1 = d1['datetime'].iloc[0]
-        d1['offset_min'] = (d1['datetime'] - s1).dt.total_seconds() / 60
-        d1['whichstreamer'] = st1
-    if not d2.empty:
-        d2.reset_index(drop=True, inplace=True)
-        s2 = d2['datetime'].iloc[0]
-        d2['offset_min'] = (d2['datetime'] - s2).dt.total_seconds() / 60
-        d2['whichstreamer'] = st2
-    c = pd.concat([d1, d2]).reset_index(drop=True)
-    return c, d1, d2
+streamer_ats = {}
+best_stretches = {}
+best_curves = {}
+top_stretches = {}
+
+def get_streamer_ats(streamer):
+    if streamer not in streamer_ats:
+        tmp = df_at[df_at['streamer'] == streamer].reset_index(drop=True)
+        streamer_ats[streamer] = (tmp, timestamps_ms(tmp['datetime']))
+    return streamer_ats[streamer]
+
+def find_best_stretch(streamer, dur):
+    key = (streamer, dur)
+    if key not in best_stretches:
+        tmp, ts = get_streamer_ats(streamer)
+        window = best_window(ts, dur * minute_ms)
+        best_stretches[key] = tmp if window is None else tmp.loc[window[0]:window[1]]
+    return best_stretches[key]
+
+def find_top_stretches(streamer, dur, k):
+    key = (streamer, dur, k)
+    if key not in top_stretches:
+        tmp, ts = get_streamer_ats(streamer)
+        top_stretches[key] = [tmp.loc[s:e] for s, e in top_windows(ts, dur * minute_ms, k)]
+    return top_stretches[key]
+
+def find_best_curve(streamer, max_minutes):
+    key = (streamer, max_minutes)
+    if key not in best_curves:
+        _, ts = get_streamer_ats(streamer)
+        best_curves[key] = best_count_curve(ts, max_minutes)
+    return best_curves[key]
+
+def overlay_data(names, dur):
+    parts = []
+    for name in names:
+        d = find_best_stretch(name, dur).copy()
+        if not d.empty:
+            d.reset_index(drop=True, inplace=True)
+            s = d['datetime'].iloc[0]
+            d['offset_min'] = (d['datetime'] - s).dt.total_seconds() / 60
+            d['whichstreamer'] = name
+        parts.append(d)
+    c = pd.concat(parts).reset_index(drop=True)
+    return c, parts
+
+def streamer_rgb(name):
+    return [c/255 for c in streamer_color(name)]
 
 fig, ax = plt.subplots(figsize=(9, 6))
 plt.subplots_adjust(left=0.25, bottom=0.25, top=0.88)
@@ -66,19 +80,84 @@ ax.set_ylabel("Time (min (sec))")
 ax_top.set_xlabel("Time offset (minutes)")
 ax.yaxis.set_major_formatter(FuncFormatter(minute_second_formatter))
 
-def update_plot():
+plotted_lines = []
+
+def clear_axes():
     ax.clear()
     ax_top.clear()
+    plotted_lines.clear()
     ax.set_ylabel("Time (min (sec))")
     ax_top.set_xlabel("Time offset (minutes)")
+
+def set_lines(specs):
+    # Single and Overlay keep their line artists between duration/streamer
+    # changes and only swap the data; the axes are cleared only when the
+    # number of lines changes or another view drew in between.
+    if len(specs) != len(plotted_lines) or any(line.axes is not ax for line in plotted_lines):
+        clear_axes()
+        for x, y, c, alpha in specs:
+            plotted_lines.append(ax.plot(x, y, marker='o', color=c, alpha=alpha)[0])
+        return
+    for line, (x, y, c, alpha) in zip(plotted_lines, specs):
+        line.set_data(x, y)
+        line.set_color(c)
+        line.set_alpha(alpha)
+    ax.relim()
+    ax.autoscale_view()
+
+def color_tick_labels(labels, names):
+    for lbl, name in zip(labels, names):
+        lbl.set_color(streamer_rgb(name))
+
+def update_plot():
     global mode, active_streamer, duration
     if mode == 'Single' and active_streamer == 'Both':
-        active_streamer = 'Lars'
+        active_streamer = streamer_names[0]
+    if mode == 'Curve':
+        clear_axes()
+        max_minutes = max(curve_minutes, duration)
+        names = streamer_names if active_streamer == 'Both' else [active_streamer]
+        minutes = list(range(1, max_minutes + 1))
+        for name in names:
+            ax.plot(minutes, find_best_curve(name, max_minutes), color=streamer_rgb(name), label=name)
+        ax.axvline(duration, color='0.5', linestyle='--')
+        ax.set_xlim(1, max_minutes)
+        ax.set_xlabel("Window length (minutes)")
+        ax.set_ylabel("Max ATs")
+        ax.legend(loc='upper left')
+        ax_top.set_xticks([])
+        ax_top.set_xlabel("")
+        ax.set_title(f"Max ATs vs window length ({', '.join(names)})", pad=20)
+        fig.canvas.draw_idle()
+        return
+    if mode == 'Top 10':
+        clear_axes()
+        names = streamer_names if active_streamer == 'Both' else [active_streamer]
+        width = 0.8 / len(names)
+        for i, name in enumerate(names):
+            stretches = find_top_stretches(name, duration, top_k)
+            x = [rank + (i - (len(names) - 1) / 2) * width for rank in range(1, len(stretches) + 1)]
+            bars = ax.bar(x, [len(d) for d in stretches], width=width, color=streamer_rgb(name), label=name)
+            for bar, d in zip(bars, stretches):
+                ax.annotate(d['datetime'].iloc[0].strftime('%m-%d %H:%M'), (bar.get_x() + bar.get_width() / 2, bar.get_height()),
+                            ha='center', va='bottom', rotation=90, fontsize=7)
+        ax.set_xticks(range(1, top_k + 1))
+        ax.set_xlim(0.5, top_k + 0.5)
+        ax.margins(y=0.3)
+        ax.set_xlabel("Rank")
+        ax.set_ylabel("ATs")
+        ax.legend(loc='upper right')
+        ax_top.set_xticks([])
+        ax_top.set_xlabel("")
+        ax.set_title(f"Top {top_k} non-overlapping {duration}-min stretches", pad=20)
+        fig.canvas.draw_idle()
+        return
     if mode == 'Single':
-        if active_streamer not in ('Lars', 'Scrapie'):
-            active_streamer = 'Lars'
-        d = find_best_stretch(streamers[active_streamer], duration).copy()
+        if active_streamer not in streamer_names:
+            active_streamer = streamer_names[0]
+        d = find_best_stretch(active_streamer, duration).copy()
         if d.empty:
+            clear_axes()
             ax.set_title("No data", pad=20)
             fig.canvas.draw_idle()
             return
@@ -86,51 +165,40 @@ def update_plot():
         d['whichstreamer'] = active_streamer
         s = d['datetime'].iloc[0]
         d['offset_min'] = (d['datetime'] - s).dt.total_seconds()/60
-        ax.set_title(f"Best {duration}-min stretch ({active_streamer}) : {len(d)} ATs", pad=20)
-        c = [x/255 for x in colors[active_streamer]]
         y_in_min = (d['timeSpent']/1000)/60
-        ax.plot(d['offset_min'], y_in_min, marker='o', color=c)
+        set_lines([(d['offset_min'], y_in_min, streamer_rgb(active_streamer), None)])
+        ax.set_title(f"Best {duration}-min stretch ({active_streamer}) : {len(d)} ATs", pad=20)
         ax.set_xlim(d['offset_min'].min(), d['offset_min'].max())
         ax_top.set_xlim(d['offset_min'].min(), d['offset_min'].max())
         ax.set_xticks(d['offset_min'])
         ax_top.set_xticks(d['offset_min'])
         ax.set_xticklabels(d['mapTitle'], rotation=45, ha='right')
         ax_top.set_xticklabels([f"{v:.1f}" for v in d['offset_min']], rotation=45, ha='left')
-        map_lbls = ax.get_xticklabels()
-        top_lbls = ax_top.get_xticklabels()
-        for lbl, (_, row) in zip(map_lbls, d.iterrows()):
-            co = [cc/255 for cc in colors[row['whichstreamer']]]
-            lbl.set_color(co)
-        for lbl, (_, row) in zip(top_lbls, d.iterrows()):
-            co = [cc/255 for cc in colors[row['whichstreamer']]]
-            lbl.set_color(co)
+        color_tick_labels(ax.get_xticklabels(), d['whichstreamer'])
+        color_tick_labels(ax_top.get_xticklabels(), d['whichstreamer'])
     else:
+        # The picked streamer over all the others, faded; 'Both' shows all
+        # of them alike.
         if active_streamer == 'Both':
-            st1, st2 = 'Lars', 'Scrapie'
-            alpha1, alpha2 = 1.0, 1.0
+            shown = [(name, 1.0) for name in streamer_names]
             tag = "(Both)"
         else:
-            if active_streamer == 'Lars':
-                st1, st2 = 'Lars', 'Scrapie'
-                alpha1, alpha2 = 1.0, 0.3
-            else:
-                st1, st2 = 'Scrapie', 'Lars'
-                alpha1, alpha2 = 1.0, 0.3
+            shown = [(active_streamer, 1.0)] + [(name, 0.3) for name in streamer_names if name != active_streamer]
             tag = "(Overlay)"
-        combined, d1, d2 = overlay_data(st1, st2, duration)
-        ax.set_title(f"Best {duration}-min stretch {tag} : {len(combined)} ATs", pad=20)
+        combined, parts = overlay_data([name for name, _ in shown], duration)
         if combined.empty:
+            clear_axes()
+            ax.set_title(f"Best {duration}-min stretch {tag} : {len(combined)} ATs", pad=20)
             ax.set_xlabel("Map Title")
             fig.canvas.draw_idle()
             return
-        c1 = [x/255 for x in colors[st1]]
-        c2 = [x/255 for x in colors[st2]]
-        if not d1.empty:
-            y_in_min_1 = (d1['timeSpent']/1000)/60
-            ax.plot(d1['offset_min'], y_in_min_1, marker='o', color=c1, alpha=alpha1)
-        if not d2.empty:
-            y_in_min_2 = (d2['timeSpent']/1000)/60
-            ax.plot(d2['offset_min'], y_in_min_2, marker='o', color=c2, alpha=alpha2)
+        specs = []
+        for (name, alpha), d in zip(shown, parts):
+            if not d.empty:
+                y_in_min = (d['timeSpent']/1000)/60
+                specs.append((d['offset_min'], y_in_min, streamer_rgb(name), alpha))
+        set_lines(specs)
+        ax.set_title(f"Best {duration}-min stretch {tag} : {len(combined)} ATs", pad=20)
         xmin = combined['offset_min'].min()
         xmax = combined['offset_min'].max()
         ax.set_xlim(xmin, xmax)
@@ -139,29 +207,23 @@ def update_plot():
         ax_top.set_xticks(combined['offset_min'])
         ax.set_xticklabels(combined['mapTitle'], rotation=45, ha='right')
         ax_top.set_xticklabels([f"{v:.1f}" for v in combined['offset_min']], rotation=45, ha='left')
-        map_lbls = ax.get_xticklabels()
-        top_lbls = ax_top.get_xticklabels()
-        for lbl, (_, row) in zip(map_lbls, combined.iterrows()):
-            co = [cc/255 for cc in colors[row['whichstreamer']]]
-            lbl.set_color(co)
-        for lbl, (_, row) in zip(top_lbls, combined.iterrows()):
-            co = [cc/255 for cc in colors[row['whichstreamer']]]
-            lbl.set_color(co)
+        color_tick_labels(ax.get_xticklabels(), combined['whichstreamer'])
+        color_tick_labels(ax_top.get_xticklabels(), combined['whichstreamer'])
     fig.canvas.draw_idle()
 
-rax1 = plt.axes([0.02, 0.78, 0.15, 0.07])
-radio1 = RadioButtons(rax1, ('Single','Overlay'), active=0)
+rax1 = plt.axes([0.02, 0.78, 0.15, 0.12])
+radio1 = RadioButtons(rax1, ('Single','Overlay','Curve','Top 10'), active=0)
 def on_view_mode(label):
     global mode, active_streamer
     mode = label
     if mode == 'Single' and active_streamer == 'Both':
-        active_streamer = 'Lars'
+        active_streamer = streamer_names[0]
         radio2.set_active(0)
     update_plot()
 radio1.on_clicked(on_view_mode)
 
 rax2 = plt.axes([0.02, 0.64, 0.15, 0.12])
-radio2 = RadioButtons(rax2, ('Lars','Scrapie','Both'))
+radio2 = RadioButtons(rax2, tuple(streamer_names) + ('Both',))
 def on_streamer(label):
     global active_streamer, mode
     active_streamer = label
@@ -184,9 +246,11 @@ txt_box = TextBox(tax4, 'Dur:', initial=str(duration))
 def on_submit(text):
     global duration
     try:
-        duration = int(text)
+        value = int(text)
     except:
-        pass
+        value = 0
+    if value > 0:
+        duration = value
     update_plot()
 txt_box.on_submit(on_submit)
 
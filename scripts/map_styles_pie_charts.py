@@ -1,22 +1,17 @@
-import sys, os, random, re
-from collections import Counter
-import pandas as pd
+import sys, os, math, random
+import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib.widgets import RadioButtons, Slider, Button
 
 current_dir = os.path.dirname(os.path.abspath(__file__))
 data_dir = os.path.join(current_dir, '..', 'data')
-export_file = os.path.join(data_dir, 'export.json')
-sys.path.append(data_dir)
+sys.path.append(os.path.join(data_dir, '..'))
 
-from states import streamers, colors
-from tag_colors import tag_colors
-
-df = pd.read_json(export_file)
-df['styles'] = df['styles'].fillna('')
-
-df_lars = df[df['player'].isin(streamers.get('Lars', []))]
-df_scrapie = df[df['player'].isin(streamers.get('Scrapie', []))]
+from data.tag_colors import tag_colors
+from data.dataset import dataset, streamer_names, streamer_color
+from data.styles import mode_filters, style_level, group_small_styles
+from ui.render import Blitter, PieArtists
+from ui.scheduler import FrameScheduler
 
 default_cutoff_percent = 0.03
 view_mode = 'Pie Chart'
@@ -44,35 +39,14 @@ def get_color(style, base_color):
         max(0, min(255, b))
     )
 
+def calc_row_counts(rows, mode):
+    filters = mode_filters(mode)
+    if filters is None:
+        return {}
+    return dataset.style_index.counts(rows, **filters)
+
 def calc_counts(df_x, mode):
-    counts = Counter()
-    if mode == 'Most':
-        for styles in df_x['styles']:
-            counts.update([s.strip() for s in styles.split(',') if s.strip()])
-    elif mode.startswith('Best'):
-        medal_type = 'at' if 'at' in mode else 'gold'
-        df_medal = df_x[df_x['medal'] == medal_type]
-        for styles in df_medal['styles']:
-            counts.update([s.strip() for s in styles.split(',') if s.strip()])
-    elif mode == 'Worst [skips]':
-        for _, row in df_x.iterrows():
-            skip = row.get('freeSkipCount', 0)
-            styles = [s.strip() for s in row['styles'].split(',') if s.strip()]
-            for style in styles:
-                counts[style] += skip
-    return dict(counts)
-
-def group_small_styles(counts, cutoff):
-    total = sum(counts.values())
-    new_counts = {}
-    other_total = 0
-    for k, v in counts.items():
-        ratio = v / total if total > 0 else 0
-        if ratio < cutoff:
-            other_total += v
-        else:
-            new_counts[k] = v
-    return new_counts, other_total
+    return calc_row_counts(dataset.style_index.positions(df_x.index), mode)
 
 def make_autopct(labels, total_counts, total_overall, other_total):
     def autopct(pct):
@@ -86,8 +60,9 @@ def make_autopct(labels, total_counts, total_overall, other_total):
     autopct.counter = 0
     return autopct
 
+pie_artists = {}
+
 def build_pie(ax, state):
-    ax.clear()
     counts, other = state.get_current_counts()
     sorted_data = sorted(counts.items(), key=lambda x: x[1], reverse=True)
     labels = [k for k, _ in sorted_data]
@@ -102,23 +77,29 @@ def build_pie(ax, state):
     colors_list = [get_color(label, state.base_color) for label in labels]
     total_overall = sum(state.total_counts.values())
     autopct_func = make_autopct(labels, state.total_counts, total_overall, other)
-    patches, texts, autotexts = ax.pie(
+    if ax not in pie_artists:
+        pie_artists[ax] = PieArtists(ax)
+    pie = pie_artists[ax]
+    rebuilt = pie.update(
         sizes,
-        labels=labels,
-        autopct=autopct_func,
+        labels,
+        colors_list,
+        autopct_func,
         startangle=90,
         pctdistance=0.8 * chart_text_farawayness,
-        labeldistance=1.1 * chart_text_farawayness,
-        colors=colors_list
+        labeldistance=1.1 * chart_text_farawayness
     )
+    patches, texts, autotexts = pie.wedges, pie.texts, pie.autotexts
     ax.set_title(f"{state.label} (Iter {state.iteration}) - {state.order_mode}", fontsize=chart_text_size + 2)
     for i, wedge in enumerate(patches):
         if labels[i] == "Other":
             autotexts[i].set_text('')
             wedge.set_picker(True)
+        else:
+            wedge.set_picker(None)
     for text in texts + autotexts:
         text.set_fontsize(chart_text_size)
-    return patches
+    return rebuilt
 
 def build_list(ax, state):
     ax.clear()
@@ -146,6 +127,61 @@ def build_list(ax, state):
         ax.text(0.5, 0.5, text, ha='center', va='center', fontsize=chart_text_size)
     ax.set_axis_off()
 
+day_pies = {}
+
+def day_axes(region_ax):
+    # A grid of small axes over the area of a streamer's pie, one per day,
+    # made when first shown and only hidden when going back to all days.
+    days = dataset.style_cube.days
+    if region_ax in day_pies and len(day_pies[region_ax]) == len(days):
+        return day_pies[region_ax]
+    for _, pie in day_pies.get(region_ax, []):
+        pie.ax.remove()
+    cols = max(1, math.ceil(math.sqrt(len(days))))
+    rows = max(1, math.ceil(len(days) / cols))
+    box = region_ax.get_position()
+    width, height = box.width / cols, box.height / rows
+    day_pies[region_ax] = [
+        (day, PieArtists(fig.add_axes([box.x0 + (i % cols) * width, box.y1 - (i // cols + 1) * height, width, height])))
+        for i, day in enumerate(days)
+    ]
+    return day_pies[region_ax]
+
+def build_day_pie(pie, state, day):
+    # Top level only, from the day's slice of the style cube.
+    filters = mode_filters(state.order_mode)
+    counts = {} if filters is None else dataset.style_cube.counts(state.label, day, **filters)
+    counts, other = group_small_styles(counts, state.cutoff)
+    sorted_data = sorted(counts.items(), key=lambda x: x[1], reverse=True)
+    labels = [k for k, _ in sorted_data]
+    sizes = [v for _, v in sorted_data]
+    if other > 0:
+        labels.append("Other")
+        sizes.append(other)
+    ax = pie.ax
+    if not sizes:
+        ax.clear()
+        pie.wedges = []
+        ax.set_axis_off()
+    else:
+        pie.update(sizes, labels, [get_color(label, state.base_color) for label in labels], lambda pct: '')
+        # Only the bigger wedges are labelled; the small pies have no room.
+        for text, size in zip(pie.texts, sizes):
+            text.set_fontsize(chart_text_size - 2)
+            text.set_visible(size >= 0.1 * sum(sizes))
+    ax.set_title(f"{np.datetime64(int(day), 'D')} ({sum(sizes)})", fontsize=chart_text_size)
+
+def redraw_days():
+    for name, state in states.items():
+        region_ax = pie_axes[name]
+        shown = streamer_focus in ['Both', name]
+        region_ax.set_visible(False)
+        for day, pie in day_axes(region_ax):
+            pie.ax.set_visible(shown)
+            if shown:
+                build_day_pie(pie, state, day)
+    blitter.update([])
+
 class PieState:
     def __init__(self, label, df_x, base_color, cutoff_slider_ax, iteration_slider_ax, redraw_callback):
         self.label = label
@@ -154,8 +190,11 @@ class PieState:
         self.order_mode = 'Most'
         self.cutoff = default_cutoff_percent
         self.iteration = 1
-        self.iterations = []
+        self.rows = dataset.style_index.positions(df_x.index)
+        self.chains = {}
+        self.chain = None
         self.total_counts = {}
+        self.total_counts_by_mode = {}
         self.redraw_callback = redraw_callback
         self.initializing = True
         self.create_cutoff_slider(cutoff_slider_ax)
@@ -172,7 +211,8 @@ class PieState:
             valstep=0.5,
             orientation='horizontal'
         )
-        self.cutoff_slider.on_changed(self.update_cutoff)
+        self.cutoff_slider.on_changed(scheduler.wrap(self.update_cutoff))
+        blitter.add_slider(self.cutoff_slider)
 
     def create_iteration_slider(self, base_ax):
         global iteration_slider_height
@@ -186,42 +226,49 @@ class PieState:
             valstep=1,
             orientation='vertical'
         )
-        self.iteration_slider.on_changed(self.update_iteration)
+        self.iteration_slider.on_changed(scheduler.wrap(self.update_iteration))
 
     def reset_state(self):
         self.iteration = 1
-        self.iterations = []
         self.cutoff = default_cutoff_percent
         self.cutoff_slider.set_val(self.cutoff * 100)
-        self.total_counts = calc_counts(self.df_x, self.order_mode)
+        if self.order_mode not in self.total_counts_by_mode:
+            self.total_counts_by_mode[self.order_mode] = calc_row_counts(self.rows, self.order_mode)
+        self.total_counts = self.total_counts_by_mode[self.order_mode]
         self.calculate_iterations()
         if not self.initializing:
             self.redraw_callback()
 
     def calculate_iterations(self):
-        self.iterations = []
-        df_current = self.df_x
-        max_iterations = 10
-        for _ in range(max_iterations):
-            counts = calc_counts(df_current, self.order_mode)
-            grouped_counts, other = group_small_styles(counts, self.cutoff)
-            subset_df = None
-            if other > 0:
-                pattern = '|'.join(map(re.escape, grouped_counts.keys()))
-                subset_df = df_current[~df_current['styles'].str.contains(pattern, regex=True)]
-                if subset_df.empty:
-                    self.iterations.append({'counts': grouped_counts, 'other': other, 'subset_df': subset_df})
-                    break
-                self.iterations.append({'counts': grouped_counts, 'other': other, 'subset_df': subset_df})
-                df_current = subset_df
-            else:
-                self.iterations.append({'counts': grouped_counts, 'other': other, 'subset_df': subset_df})
-                break
-        self.iteration_slider.valmax = len(self.iterations)
-        self.iteration_slider.ax.set_ylim(1, len(self.iterations))
+        # Drill-down levels are only computed when they are first shown and
+        # are kept per (mode, cutoff), each as the row positions it covers.
+        key = (self.order_mode, self.cutoff)
+        if key not in self.chains:
+            self.chains[key] = {'levels': [], 'next_rows': self.rows, 'done': False}
+        self.chain = self.chains[key]
+        self.compute_level(1)
+        self.update_iteration_slider()
         self.iteration_slider.set_val(1)
         self.iteration = 1
 
+    def compute_level(self, iteration):
+        max_iterations = 10
+        chain = self.chain
+        while len(chain['levels']) < iteration and not chain['done']:
+            rows = chain['next_rows']
+            grouped_counts, other, next_rows = style_level(dataset.style_index, rows, self.order_mode, self.cutoff)
+            chain['levels'].append({'counts': grouped_counts, 'other': other, 'rows': rows})
+            chain['next_rows'] = next_rows
+            chain['done'] = next_rows is None or len(chain['levels']) >= max_iterations
+        return min(iteration, len(chain['levels']))
+
+    def available_iterations(self):
+        return len(self.chain['levels']) + (0 if self.chain['done'] else 1)
+
+    def update_iteration_slider(self):
+        self.iteration_slider.valmax = self.available_iterations()
+        self.iteration_slider.ax.set_ylim(1, self.available_iterations())
+
     def set_mode(self, mode):
         self.order_mode = mode
         self.reset_state()
@@ -231,8 +278,9 @@ class PieState:
         self.reset_state()
 
     def drill_down(self):
-        if self.iteration < len(self.iterations):
-            self.iteration += 1
+        if self.iteration < self.available_iterations():
+            self.iteration = self.compute_level(self.iteration + 1)
+            self.update_iteration_slider()
             self.iteration_slider.set_val(self.iteration)
             self.redraw_callback()
 
@@ -246,7 +294,7 @@ class PieState:
         self.calculate_iterations()
         self.iteration_slider.set_val(1)
         self.iteration = 1
-        self.redraw_callback()
+        self.redraw_callback(self.cutoff_slider)
 
     def update_iteration(self, val):
         if self.initializing:
@@ -254,96 +302,97 @@ class PieState:
         new_iter = int(val)
         if new_iter < 1:
             new_iter = 1
-        elif new_iter > len(self.iterations):
-            new_iter = len(self.iterations)
+        else:
+            new_iter = self.compute_level(new_iter)
+            self.update_iteration_slider()
         self.iteration = new_iter
         self.redraw_callback()
 
     def get_current_counts(self):
-        if self.iteration - 1 < len(self.iterations):
-            return self.iterations[self.iteration - 1]['counts'], self.iterations[self.iteration - 1]['other']
+        levels = self.chain['levels']
+        if self.iteration - 1 < len(levels):
+            return levels[self.iteration - 1]['counts'], levels[self.iteration - 1]['other']
         return {}, 0
 
     def get_subset_df(self):
-        if self.iteration - 1 < len(self.iterations):
-            return self.iterations[self.iteration - 1]['subset_df']
+        levels = self.chain['levels']
+        if self.iteration < len(levels):
+            return dataset.df.iloc[levels[self.iteration]['rows']]
         return None
 
-def redraw_charts():
-    pie_ax_lars.clear()
-    pie_ax_scrapie.clear()
-    if view_mode == 'Pie Chart':
-        if streamer_focus in ['Both', 'Lars']:
-            build_pie(pie_ax_lars, state_lars)
-            pie_ax_lars.set_visible(True)
-        else:
-            pie_ax_lars.set_visible(False)
-        if streamer_focus in ['Both', 'Scrapie']:
-            build_pie(pie_ax_scrapie, state_scrapie)
-            pie_ax_scrapie.set_visible(True)
-        else:
-            pie_ax_scrapie.set_visible(False)
+def redraw_charts(slider=None):
+    # Pies keep their artists between redraws. If no pie had to be rebuilt,
+    # a cutoff drag only blits the moved wedges and texts.
+    if days_mode == 'Individual Days':
+        redraw_days()
+    elif view_mode == 'Pie Chart':
+        rebuilt = False
+        artists = []
+        for name, state in states.items():
+            ax = pie_axes[name]
+            if streamer_focus in ['Both', name]:
+                rebuilt |= build_pie(ax, state)
+                artists += pie_artists[ax].artists() + [ax.title]
+                ax.set_visible(True)
+            else:
+                ax.set_visible(False)
+        blitter.update(artists, None if rebuilt else slider)
     else:
-        if streamer_focus in ['Both', 'Lars']:
-            build_list(pie_ax_lars, state_lars)
-            pie_ax_lars.set_visible(True)
-        else:
-            pie_ax_lars.set_visible(False)
-        if streamer_focus in ['Both', 'Scrapie']:
-            build_list(pie_ax_scrapie, state_scrapie)
-            pie_ax_scrapie.set_visible(True)
-        else:
-            pie_ax_scrapie.set_visible(False)
-    fig.canvas.draw_idle()
+        for name, state in states.items():
+            ax = pie_axes[name]
+            if streamer_focus in ['Both', name]:
+                build_list(ax, state)
+                ax.set_visible(True)
+            else:
+                ax.set_visible(False)
+        blitter.update([])
 
 def on_pick(event):
     wedge = event.artist
     label = wedge.get_label()
-    if label == "Other":
-        if wedge.axes == pie_ax_lars and streamer_focus in ['Both', 'Lars']:
-            state_lars.drill_down()
-        elif wedge.axes == pie_ax_scrapie and streamer_focus in ['Both', 'Scrapie']:
-            state_scrapie.drill_down()
+    if label == "Other" and days_mode == 'All Days':
+        for name, state in states.items():
+            if wedge.axes == pie_axes[name] and streamer_focus in ['Both', name]:
+                state.drill_down()
         redraw_charts()
 
 def update_order(label):
-    state_lars.set_mode(label)
-    state_scrapie.set_mode(label)
+    for state in states.values():
+        state.set_mode(label)
     redraw_charts()
 
 def update_view(label):
     global view_mode
     view_mode = label
     if view_mode == 'Pie Chart':
-        state_lars.cutoff_slider.ax.set_visible(True)
-        state_scrapie.cutoff_slider.ax.set_visible(True)
+        for state in states.values():
+            state.cutoff_slider.ax.set_visible(True)
         text_size_slider.ax.set_visible(True)
         text_far_slider.ax.set_visible(True)
         cutoff_slider_step = 0.5
         cutoff_slider_min = 1
         cutoff_slider_max = 6
     else:
-        state_lars.cutoff_slider.ax.set_visible(True)
-        state_scrapie.cutoff_slider.ax.set_visible(True)
+        for state in states.values():
+            state.cutoff_slider.ax.set_visible(True)
         text_size_slider.ax.set_visible(True)
         text_far_slider.ax.set_visible(False)
-        max_pct_lars = max(state_lars.total_counts.values()) / sum(state_lars.total_counts.values()) * 100 if sum(state_lars.total_counts.values()) > 0 else 100
-        max_pct_scrapie = max(state_scrapie.total_counts.values()) / sum(state_scrapie.total_counts.values()) * 100 if sum(state_scrapie.total_counts.values()) > 0 else 100
+        max_pcts = [
+            max(state.total_counts.values()) / sum(state.total_counts.values()) * 100 if sum(state.total_counts.values()) > 0 else 100
+            for state in states.values()
+        ]
         cutoff_slider_step = 0.1
         cutoff_slider_min = 0
-        cutoff_slider_max = max(max_pct_lars, max_pct_scrapie)
-        state_lars.cutoff_slider.valmin = cutoff_slider_min
-        state_lars.cutoff_slider.valmax = cutoff_slider_max
-        state_lars.cutoff_slider.valstep = cutoff_slider_step
-        state_lars.cutoff_slider.set_val(0)
-        state_scrapie.cutoff_slider.valmin = cutoff_slider_min
-        state_scrapie.cutoff_slider.valmax = cutoff_slider_max
-        state_scrapie.cutoff_slider.valstep = cutoff_slider_step
-        state_scrapie.cutoff_slider.set_val(0)
-    state_lars.cutoff_slider.ax.figure.canvas.draw_idle()
-    state_scrapie.cutoff_slider.ax.figure.canvas.draw_idle()
-    state_lars.reset_state()
-    state_scrapie.reset_state()
+        cutoff_slider_max = max(max_pcts)
+        for state in states.values():
+            state.cutoff_slider.valmin = cutoff_slider_min
+            state.cutoff_slider.valmax = cutoff_slider_max
+            state.cutoff_slider.valstep = cutoff_slider_step
+            state.cutoff_slider.set_val(0)
+    for state in states.values():
+        state.cutoff_slider.ax.figure.canvas.draw_idle()
+    for state in states.values():
+        state.reset_state()
 
 def update_player(label):
     global streamer_focus
@@ -353,11 +402,18 @@ def update_player(label):
 def update_days(label):
     global days_mode
     days_mode = label
+    # Per-day pies have no drill-down, so no iteration sliders either.
+    for state in states.values():
+        state.iteration_slider.ax.set_visible(days_mode == 'All Days')
+    if days_mode == 'All Days':
+        for pies in day_pies.values():
+            for _, pie in pies:
+                pie.ax.set_visible(False)
     redraw_charts()
 
 def reset_button_callback(event):
-    state_lars.reset_state()
-    state_scrapie.reset_state()
+    for state in states.values():
+        state.reset_state()
 
 def update_text_size(val):
     global chart_text_size
@@ -370,10 +426,16 @@ def update_text_farawayness(val):
     redraw_charts()
 
 fig = plt.figure(figsize=(20, 12))
+blitter = Blitter(fig)
+scheduler = FrameScheduler(fig)
 plt.subplots_adjust(left=0.05, right=0.95, top=0.85, bottom=0.02)
 
-pie_ax_lars = fig.add_axes([0.1, 0.3, 0.35, 0.6])
-pie_ax_scrapie = fig.add_axes([0.55, 0.3, 0.35, 0.6])
+# One pie per streamer, side by side between 0.1 and 0.9 with 0.1 between
+# them. The first has its iteration slider on its left, the others on
+# their right.
+pie_width = (0.8 - 0.1 * (len(streamer_names) - 1)) / len(streamer_names)
+pie_lefts = {name: 0.1 + i * (pie_width + 0.1) for i, name in enumerate(streamer_names)}
+pie_axes = {name: fig.add_axes([left, 0.3, pie_width, 0.6]) for name, left in pie_lefts.items()}
 
 order_ax = fig.add_axes([0.1, 0.15, 0.15, 0.1])
 order_radio = RadioButtons(order_ax, ('Most', 'Best [at]', 'Best [gold]', 'Worst [skips]'))
@@ -382,13 +444,12 @@ view_ax = fig.add_axes([0.3, 0.15, 0.15, 0.1])
 view_radio = RadioButtons(view_ax, ('Pie Chart', 'Ordered List'))
 
 player_ax = fig.add_axes([0.5, 0.15, 0.15, 0.1])
-player_radio = RadioButtons(player_ax, ('Lars', 'Scrapie', 'Both'))
+player_radio = RadioButtons(player_ax, tuple(streamer_names) + ('Both',), active=len(streamer_names))
 
 days_ax = fig.add_axes([0.7, 0.15, 0.2, 0.1])
 days_radio = RadioButtons(days_ax, ('All Days', 'Individual Days'))
 
-cutoff_ax_lars = fig.add_axes([0.1, 0.08, 0.35, 0.02])
-cutoff_ax_scrapie = fig.add_axes([0.55, 0.08, 0.35, 0.02])
+cutoff_axes = {name: fig.add_axes([left, 0.08, pie_width, 0.02]) for name, left in pie_lefts.items()}
 
 text_far_ax = fig.add_axes([0.1, 0.05, 0.35, 0.02])
 text_far_slider = Slider(
@@ -399,7 +460,7 @@ text_far_slider = Slider(
     valstep=0.1,
     orientation='horizontal'
 )
-text_far_slider.on_changed(update_text_farawayness)
+text_far_slider.on_changed(scheduler.wrap(update_text_farawayness))
 
 text_size_ax = fig.add_axes([0.55, 0.05, 0.35, 0.02])
 text_size_slider = Slider(
@@ -410,30 +471,27 @@ text_size_slider = Slider(
     valstep=1,
     orientation='horizontal'
 )
-text_size_slider.on_changed(update_text_size)
+text_size_slider.on_changed(scheduler.wrap(update_text_size))
 
-iteration_ax_lars = fig.add_axes([0.08, 0.3, 0.02, 0.6])
-iteration_ax_scrapie = fig.add_axes([0.93, 0.3, 0.02, 0.6])
+iteration_axes = {
+    name: fig.add_axes([left - 0.02 if i == 0 else left + pie_width + 0.03, 0.3, 0.02, 0.6])
+    for i, (name, left) in enumerate(pie_lefts.items())
+}
 
 reset_ax = fig.add_axes([0.8, 0.02, 0.1, 0.04])
 reset_button = Button(reset_ax, 'Reset Iter', hovercolor='0.975')
 
-state_lars = PieState(
-    "Lars",
-    df_lars,
-    tuple_to_hex(colors['Lars']),
-    cutoff_ax_lars,
-    iteration_ax_lars,
-    redraw_charts
-)
-state_scrapie = PieState(
-    "Scrapie",
-    df_scrapie,
-    tuple_to_hex(colors['Scrapie']),
-    cutoff_ax_scrapie,
-    iteration_ax_scrapie,
-    redraw_charts
-)
+states = {
+    name: PieState(
+        name,
+        dataset.streamer(name),
+        tuple_to_hex(streamer_color(name)),
+        cutoff_axes[name],
+        iteration_axes[name],
+        redraw_charts
+    )
+    for name in streamer_names
+}
 
 order_radio.on_clicked(update_order)
 view_radio.on_clicked(update_view)
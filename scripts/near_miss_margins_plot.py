@@ -0,0 +1,10 @@
+import sys
+import os
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+data_dir = os.path.join(current_dir, '..', 'data')
+sys.path.append(os.path.join(data_dir, '..'))
+
+from ui.near_miss_view import show_near_misses
+
+view = show_near_misses(['diff', 'pb_diff'])
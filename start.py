@@ -1,9 +1,49 @@
 import os
 import sys
-import subprocess
+
+def print_scripts(scripts):
+    print("Available scripts in the 'scripts' directory:\n")
+    for idx, script_name in enumerate(scripts, start=1):
+        print(f"{idx}. {script_name}")
+
+def warm_menu(scripts_dir, scripts):
+    # Loads the libraries and the export once; every chart opened from this
+    # menu starts from that loaded state instead of a fresh interpreter.
+    from ui.launcher import Launcher
+    launcher = Launcher()
+    launcher.start()
+    try:
+        while True:
+            print_scripts(scripts)
+            choice = input("\nEnter the number of the script you want to run (empty to quit): ")
+            if not choice.strip():
+                break
+            try:
+                choice_idx = int(choice) - 1
+            except ValueError:
+                print("Please enter a valid number.")
+                continue
+            if choice_idx < 0 or choice_idx >= len(scripts):
+                print("Invalid choice.")
+                continue
+            launcher.run(os.path.join(scripts_dir, scripts[choice_idx]))
+            print()
+    except (KeyboardInterrupt, EOFError):
+        print("\nExiting.")
+    finally:
+        launcher.stop()
 
 def main():
     base_dir = os.path.dirname(os.path.abspath(__file__))
+    if sys.argv[1:2] == ['--render']:
+        # Headless: render every chart variant to files instead of a menu.
+        from ui.batch import main as render_main
+        render_main(sys.argv[2:])
+        return
+    if sys.argv[1:2] == ['--html']:
+        from ui.html_export import main as html_main
+        html_main(sys.argv[2:])
+        return
     scripts_dir = os.path.join(base_dir, 'scripts')
     if not os.path.exists(scripts_dir) or not os.path.isdir(scripts_dir):
         print("No 'scripts' directory found.")
@@ -14,9 +54,11 @@ def main():
         print("No .py scripts found in the 'scripts' directory.")
         return
 
-    print("Available scripts in the 'scripts' directory:\n")
-    for idx, script_name in enumerate(scripts, start=1):
-        print(f"{idx}. {script_name}")
+    if sys.argv[1:2] == ['--warm']:
+        warm_menu(scripts_dir, scripts)
+        return
+
+    print_scripts(scripts)
 
     try:
         choice = input("\nEnter the number of the script you want to run: ")
@@ -25,6 +67,8 @@ def main():
             print("Invalid choice.")
             return
         chosen_script = scripts[choice_idx]
+        # Imported here so the menu appears without loading anything else.
+        import subprocess
         subprocess.run([sys.executable, os.path.join(scripts_dir, chosen_script)])
     except ValueError:
         print("Please enter a valid number.")
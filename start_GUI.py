@@ -1,26 +1,146 @@
 import os
 import sys
+import json
+import time
+import queue
+import threading
 import subprocess
 import tkinter as tk
 from tkinter import messagebox
 
+base_dir = os.path.dirname(os.path.abspath(__file__))
+runner = os.path.join(base_dir, 'ui', 'runner.py')
+runner_marker = '@runner'
+usage_file = os.path.join(base_dir, '.launcher_usage.json')
+# How many of the most used scripts are kept loaded in the background.
+prestart_count = 2
+poll_ms = 200
+
+charts = []
+standby = {}
+events = queue.Queue()
+
+def load_usage():
+    try:
+        with open(usage_file) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def count_usage(script):
+    usage = load_usage()
+    usage[script] = usage.get(script, 0) + 1
+    try:
+        with open(usage_file, 'w') as f:
+            json.dump(usage, f)
+    except OSError:
+        pass
+
+def read_output(chart):
+    # Runs in a thread per child: status lines go to the Tk loop through the
+    # queue, everything else the script prints is passed through.
+    for line in chart['proc'].stdout:
+        if line.startswith(runner_marker):
+            events.put((chart, line.split()[1], time.perf_counter()))
+        else:
+            sys.stdout.write(line)
+
+def spawn(script, preload):
+    args = [sys.executable, runner] + (['--standby'] if preload else []) + [os.path.join(scripts_dir, script)]
+    proc = subprocess.Popen(
+        args, cwd=base_dir, text=True, bufsize=1,
+        stdin=subprocess.PIPE if preload else subprocess.DEVNULL, stdout=subprocess.PIPE
+    )
+    chart = {'script': script, 'proc': proc, 'status': 'loading' if preload else 'starting',
+             'started': time.perf_counter(), 'startup': None}
+    threading.Thread(target=read_output, args=(chart,), daemon=True).start()
+    return chart
+
+def prestart():
+    usage = load_usage()
+    favorites = sorted((s for s in scripts if usage.get(s)), key=lambda s: -usage[s])[:prestart_count]
+    for script in favorites:
+        chart = standby.get(script)
+        if chart is None or chart['proc'].poll() is not None:
+            standby[script] = spawn(script, preload=True)
+
+def launch(script):
+    chart = standby.pop(script, None)
+    if chart is not None and chart['proc'].poll() is None:
+        chart['proc'].stdin.write('\n')
+        chart['proc'].stdin.flush()
+        chart['status'] = 'starting'
+        chart['started'] = time.perf_counter()
+    else:
+        chart = spawn(script, preload=False)
+    charts.append(chart)
+    count_usage(script)
+    prestart()
+
 def run_selected_script():
     selection = listbox.curselection()
     if not selection:
         messagebox.showwarning("No selection", "Please select a script first.")
         return
-    index = selection[0]
-    chosen_script = scripts[index]
     try:
-        subprocess.run([sys.executable, os.path.join(scripts_dir, chosen_script)])
-    except KeyboardInterrupt:
-        pass
+        launch(scripts[selection[0]])
     except Exception as e:
         messagebox.showerror("Error", str(e))
+    refresh_status()
+
+def close_selected_chart():
+    selection = status_list.curselection()
+    running = [c for c in charts if c['proc'].poll() is None]
+    if selection and selection[0] < len(running):
+        running[selection[0]]['proc'].terminate()
+
+def describe(chart):
+    text = f"{chart['script']}  [{chart['proc'].pid}]  {chart['status']}"
+    if chart['startup'] is not None:
+        text += f"  (opened in {chart['startup']:.2f}s)"
+    return text
+
+def refresh_status():
+    status_list.delete(0, tk.END)
+    for chart in charts:
+        if chart['proc'].poll() is None:
+            status_list.insert(tk.END, describe(chart))
+    for chart in standby.values():
+        if chart['proc'].poll() is None:
+            status_list.insert(tk.END, f"{chart['script']}  preloaded, {'ready' if chart['status'] == 'standby' else 'loading'}")
+
+def poll():
+    while not events.empty():
+        chart, status, at = events.get()
+        if status == 'drawn':
+            chart['status'] = 'running'
+            chart['startup'] = at - chart['started']
+        elif status == 'standby' and chart['status'] == 'loading':
+            # A chart launched while still loading is already 'starting';
+            # its standby line arriving late must not set it back.
+            chart['status'] = 'standby'
+    for chart in charts:
+        code = chart['proc'].poll()
+        if code is not None and chart['status'] != 'closed':
+            chart['status'] = 'closed'
+            if code != 0:
+                print(f"{chart['script']} exited with code {code}")
+    charts[:] = [c for c in charts if c['status'] != 'closed']
+    refresh_status()
+    root.after(poll_ms, poll)
+
+def on_close():
+    # Preloaded children are only waiting for a line; closing their stdin
+    # ends them. Open charts keep running on their own.
+    for chart in standby.values():
+        try:
+            chart['proc'].stdin.close()
+        except OSError:
+            pass
+    root.destroy()
 
 def main():
-    global scripts, scripts_dir, listbox
-    base_dir = os.path.dirname(os.path.abspath(__file__))
+    global scripts, scripts_dir, listbox, status_list, root
     scripts_dir = os.path.join(base_dir, 'scripts')
     if not os.path.isdir(scripts_dir):
         messagebox.showerror("Error", f"No 'scripts' directory found in:\n{scripts_dir}")
@@ -32,6 +152,7 @@ def main():
 
     root = tk.Tk()
     root.title("Script Runner")
+    root.protocol("WM_DELETE_WINDOW", on_close)
 
     frame = tk.Frame(root)
     frame.pack(padx=10, pady=10)
@@ -47,6 +168,17 @@ def main():
     run_button = tk.Button(frame, text="Run Script", command=run_selected_script)
     run_button.pack(pady=5)
 
+    status_label = tk.Label(frame, text="Open charts:")
+    status_label.pack()
+
+    status_list = tk.Listbox(frame, width=70, height=6)
+    status_list.pack(pady=5)
+
+    close_button = tk.Button(frame, text="Close Chart", command=close_selected_chart)
+    close_button.pack(pady=5)
+
+    prestart()
+    root.after(poll_ms, poll)
     root.mainloop()
 
 if __name__ == "__main__":
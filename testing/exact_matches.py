@@ -1,6 +1,7 @@
 import sys
 import os
-import pandas as pd
+import math
+import numpy as np
 import matplotlib.pyplot as plt
 import random
 from matplotlib.widgets import RadioButtons, Slider
@@ -9,7 +10,9 @@ current_dir = os.path.dirname(os.path.abspath(__file__))
 data_dir = os.path.join(current_dir, '..', 'data')
 sys.path.append(os.path.join(data_dir, '..'))
 
-from data.states import colors, streamers
+from data.dataset import dataset, streamer_names
+from ui.render import Blitter, PieArtists
+from ui.scheduler import FrameScheduler, BackgroundQueue
 
 tag_colors = {
     "Race": "", "FullSpeed": "", "Tech": "", "RPG": "", "LOL": "", "Press Forward": "",
@@ -31,11 +34,6 @@ tag_colors = {
     "Magnet": "", "NoGrip": ""
 }
 
-df = pd.read_json(os.path.join(data_dir, 'export.json'))
-df['styles'] = df['styles'].fillna('')
-df_lars = df[df['player'].isin(streamers.get("Lars", []))]
-df_scrapie = df[df['player'].isin(streamers.get("Scrapie", []))]
-
 def get_color(style):
     if style in tag_colors and tag_colors[style]:
         c = tag_colors[style]
@@ -45,40 +43,18 @@ def get_color(style):
     random.seed(hash(style))
     return "#" + "".join(random.choice("0123456789ABCDEF") for _ in range(6))
 
-def get_styles_counts(df_x):
-    counts = {}
-    for row in df_x['styles']:
-        sp = [s.strip() for s in row.split(',') if s.strip()]
-        for style in sp:
-            counts[style] = counts.get(style, 0) + 1
-    return counts
+def get_styles_counts(df_x, **filters):
+    style_index = dataset.style_index
+    return style_index.counts(style_index.positions(df_x.index), **filters)
 
 def get_styles_counts_golds(df_x):
-    counts = {}
-    df_gold = df_x[df_x['medal'] == 'gold']
-    for row in df_gold['styles']:
-        sp = [s.strip() for s in row.split(',') if s.strip()]
-        for style in sp:
-            counts[style] = counts.get(style, 0) + 1
-    return counts
+    return get_styles_counts(df_x, medal='gold')
 
 def get_styles_counts_ats(df_x):
-    counts = {}
-    df_at = df_x[df_x['medal'] == 'at']
-    for row in df_at['styles']:
-        sp = [s.strip() for s in row.split(',') if s.strip()]
-        for style in sp:
-            counts[style] = counts.get(style, 0) + 1
-    return counts
+    return get_styles_counts(df_x, medal='at')
 
 def get_styles_counts_skips(df_x):
-    counts = {}
-    for idx, row in df_x.iterrows():
-        sp = [s.strip() for s in row['styles'].split(',') if s.strip()]
-        skip = row['freeSkipCount']
-        for style in sp:
-            counts[style] = counts.get(style, 0) + skip
-    return counts
+    return get_styles_counts(df_x, weight='freeSkipCount')
 
 def calc_counts(df_x, mode):
     if mode == 'Most':
@@ -91,6 +67,14 @@ def calc_counts(df_x, mode):
         return get_styles_counts_skips(df_x)
     return {}
 
+# calc_counts' modes as filters for slices of the style cube.
+cube_filters = {
+    'Most': {},
+    'Best': {'medal': 'at'},
+    'Best [golds]': {'medal': 'gold'},
+    'Worst [skips]': {'weight': 'freeSkipCount'},
+}
+
 def group_small_styles(counts):
     total = sum(counts.values())
     new_counts = {}
@@ -106,54 +90,96 @@ def group_small_styles(counts):
                 new_counts[k] = v
     return new_counts, other_total
 
+# Levels worked out ahead of time for every mode while the window is idle.
+precompute_levels = 10
+
+def deeper_level(level):
+    c, o, it = level
+    sub_counts = {}
+    total = sum(c.values()) + o
+    for k, v in c.items():
+        if total > 0 and v / total < 0.02:
+            sub_counts[k] = v
+    if len(sub_counts) == 0:
+        return None
+    return (sub_counts, 0, it + 1)
+
 class PieHistory:
+    # Keeps every level computed for each mode, so going back to a mode or
+    # moving the iteration slider only changes which level is shown.
     def __init__(self, label, df_x):
         self.label = label
         self.df_x = df_x
         self.order_mode = 'Most'
-        self.stack = []
+        self.stacks = {}
+        self.depth = 0
         self.create_initial()
 
+    def level(self, mode, i):
+        # The i-th level (from 0) of the mode, or None past the deepest one.
+        if mode not in self.stacks:
+            c = calc_counts(self.df_x, mode)
+            c, o = group_small_styles(c)
+            self.stacks[mode] = {'levels': [(c, o, 1)], 'done': False}
+        stack = self.stacks[mode]
+        levels = stack['levels']
+        while len(levels) <= i and not stack['done']:
+            level = deeper_level(levels[-1])
+            if level is None:
+                stack['done'] = True
+            else:
+                levels.append(level)
+        return levels[i] if i < len(levels) else None
+
+    def precompute(self, mode):
+        self.level(mode, precompute_levels - 1)
+
     def create_initial(self):
-        c = calc_counts(self.df_x, self.order_mode)
-        c, o = group_small_styles(c)
-        self.stack = [(c, o, 1)]
+        self.level(self.order_mode, 0)
+        self.depth = 0
+
+    @property
+    def stack(self):
+        return self.stacks[self.order_mode]['levels'][:self.depth + 1]
 
     def current(self):
-        return self.stack[-1]
+        return self.stacks[self.order_mode]['levels'][self.depth]
 
     def set_mode_and_reset(self, mode):
         self.order_mode = mode
         self.create_initial()
 
     def go_deeper(self):
-        c, o, it = self.current()
-        sub_counts = {}
-        total = sum(c.values()) + o
-        for k, v in c.items():
-            if total > 0 and v / total < 0.02:
-                sub_counts[k] = v
-        if len(sub_counts) == 0:
-            return
-        self.stack.append((sub_counts, 0, it + 1))
+        if self.level(self.order_mode, self.depth + 1) is not None:
+            self.depth += 1
 
     def go_up(self):
-        if len(self.stack) > 1:
-            self.stack.pop()
+        if self.depth > 0:
+            self.depth -= 1
+
+    def show_iteration(self, it):
+        # Where going deeper it - 1 times from the top would end up.
+        self.level(self.order_mode, it - 1)
+        self.depth = min(it - 1, len(self.stacks[self.order_mode]['levels']) - 1)
+
+pie_artists = {}
 
 def build_pie(ax, state):
     c, o, it = state.current()
-    ax.clear()
     data = dict(c)
     if o > 0:
         data["Other"] = o
     keys = list(data.keys())
     vals = [data[k] for k in keys]
     colors_list = [get_color(k) for k in keys]
-    patches, texts, autotexts = ax.pie(vals, labels=keys, autopct='%1.1f%%', startangle=90, colors=colors_list)
+    if ax not in pie_artists:
+        pie_artists[ax] = PieArtists(ax)
+    pie = pie_artists[ax]
+    rebuilt = pie.update(vals, keys, colors_list, lambda pct: '%1.1f%%' % pct, startangle=90)
     ax.set_title(f"{state.label} (iteration {it}): {state.order_mode}")
-    for wedge in patches:
+    for wedge in pie.wedges:
         wedge.set_picker(5)
+    return rebuilt
 
 def build_list(ax, state):
     c, o, it = state.current()
@@ -168,12 +194,57 @@ def build_list(ax, state):
     else:
         ax.text(0.5, 0.5, f"{state.label} (iteration {it}):\n\n{display_str}", ha='center', va='center')
 
-df_state_lars = PieHistory("Lars", df_lars)
-df_state_scrapie = PieHistory("Scrapie", df_scrapie)
+day_pies = {}
+
+def day_axes(region_ax):
+    # One small axes per day over the area of a streamer's pie.
+    days = dataset.style_cube.days
+    if region_ax in day_pies and len(day_pies[region_ax]) == len(days):
+        return day_pies[region_ax]
+    for _, pie in day_pies.get(region_ax, []):
+        pie.ax.remove()
+    cols = max(1, math.ceil(math.sqrt(len(days))))
+    rows = max(1, math.ceil(len(days) / cols))
+    box = region_ax.get_position()
+    width, height = box.width / cols, box.height / rows
+    day_pies[region_ax] = [
+        (day, PieArtists(fig.add_axes([box.x0 + (i % cols) * width, box.y1 - (i // cols + 1) * height, width, height])))
+        for i, day in enumerate(days)
+    ]
+    return day_pies[region_ax]
+
+def build_day_pie(pie, state, day):
+    filters = cube_filters.get(state.order_mode)
+    counts = {} if filters is None else dataset.style_cube.counts(state.label, day, **filters)
+    c, o = group_small_styles(counts)
+    data = dict(c)
+    if o > 0:
+        data["Other"] = o
+    keys = list(data.keys())
+    vals = [data[k] for k in keys]
+    ax = pie.ax
+    if sum(vals) == 0:
+        ax.clear()
+        pie.wedges = []
+        ax.set_axis_off()
+    else:
+        pie.update(vals, keys, [get_color(k) for k in keys], lambda pct: '', startangle=90)
+        for text, v in zip(pie.texts, vals):
+            text.set_fontsize(8)
+            text.set_visible(v >= 0.1 * sum(vals))
+    ax.set_title(f"{np.datetime64(int(day), 'D')} ({sum(vals)})", fontsize=9)
+
+states = {name: PieHistory(name, dataset.streamer(name)) for name in streamer_names}
 
 fig = plt.figure(figsize=(14, 9))
-pie_ax_lars = fig.add_axes([0.05, 0.25, 0.38, 0.65])
-pie_ax_scrapie = fig.add_axes([0.57, 0.25, 0.38, 0.65])
+blitter = Blitter(fig)
+scheduler = FrameScheduler(fig)
+background = BackgroundQueue(fig)
+# One pie per streamer between 0.05 and 0.95, each with its iteration
+# slider just left of it.
+pie_width = (0.9 - 0.14 * (len(streamer_names) - 1)) / len(streamer_names)
+pie_lefts = {name: 0.05 + i * (pie_width + 0.14) for i, name in enumerate(streamer_names)}
+pie_axes = {name: fig.add_axes([left, 0.25, pie_width, 0.65]) for name, left in pie_lefts.items()}
 
 order_ax = fig.add_axes([0.05, 0.1, 0.25, 0.1])
 order_radio = RadioButtons(order_ax, ('Most', 'Best', 'Best [golds]', 'Worst [skips]'))
@@ -184,38 +255,43 @@ list_radio = RadioButtons(list_ax, ('Pie Chart', 'Ordered List'))
 days_ax = fig.add_axes([0.52, 0.1, 0.2, 0.1])
 days_radio = RadioButtons(days_ax, ('Single Chart', 'Show chart for individual days'))
 
-slider_ax_lars = fig.add_axes([0.01, 0.25, 0.03, 0.65])
-slider_ax_scrapie = fig.add_axes([0.53, 0.25, 0.03, 0.65])
-slider_lars = Slider(slider_ax_lars, 'Iter L', 1, 1, valinit=1, valstep=1)
-slider_scrapie = Slider(slider_ax_scrapie, 'Iter S', 1, 1, valinit=1, valstep=1)
+slider_axes = {name: fig.add_axes([left - 0.04, 0.25, 0.03, 0.65]) for name, left in pie_lefts.items()}
+sliders = {name: Slider(ax, 'Iter ' + name[:1], 1, 1, valinit=1, valstep=1) for name, ax in slider_axes.items()}
+for slider in sliders.values():
+    blitter.add_slider(slider)
 
 chart_mode = 'Pie Chart'
 days_mode = 'Single Chart'
 
 def draw_charts():
-    df_state_lars.set_mode_and_reset(df_state_lars.order_mode)
-    df_state_scrapie.set_mode_and_reset(df_state_scrapie.order_mode)
-    slider_lars.valmax = 1
-    slider_scrapie.valmax = 1
-    slider_lars.set_val(1)
-    slider_scrapie.set_val(1)
-    pie_ax_lars.clear()
-    pie_ax_scrapie.clear()
+    for state in states.values():
+        state.set_mode_and_reset(state.order_mode)
+    for slider in sliders.values():
+        slider.valmax = 1
+    for slider in sliders.values():
+        slider.set_val(1)
+    for pies in day_pies.values():
+        for _, pie in pies:
+            pie.ax.set_visible(days_mode != 'Single Chart')
+    for ax in list(pie_axes.values()) + list(slider_axes.values()):
+        ax.set_visible(days_mode == 'Single Chart')
     if days_mode == 'Single Chart':
-        if chart_mode == 'Pie Chart':
-            build_pie(pie_ax_lars, df_state_lars)
-            build_pie(pie_ax_scrapie, df_state_scrapie)
-        else:
-            build_list(pie_ax_lars, df_state_lars)
-            build_list(pie_ax_scrapie, df_state_scrapie)
+        for name, state in states.items():
+            if chart_mode == 'Pie Chart':
+                build_pie(pie_axes[name], state)
+            else:
+                build_list(pie_axes[name], state)
     else:
-        pie_ax_lars.text(0.5, 0.5, "14x2 day charts not implemented", ha='center', va='center')
-        pie_ax_scrapie.text(0.5, 0.5, "14x2 day charts not implemented", ha='center', va='center')
+        # A pie per streamer and day, each a slice of the style cube.
+        for name, state in states.items():
+            for day, pie in day_axes(pie_axes[name]):
+                pie.ax.set_visible(True)
+                build_day_pie(pie, state, day)
     fig.canvas.draw_idle()
 
 def order_radio_func(label):
-    df_state_lars.set_mode_and_reset(label)
-    df_state_scrapie.set_mode_and_reset(label)
+    for state in states.values():
+        state.set_mode_and_reset(label)
     draw_charts()
 
 def list_radio_func(label):
@@ -228,44 +304,32 @@ def days_radio_func(label):
     days_mode = label
     draw_charts()
 
-def slider_lars_func(val):
-    it = int(slider_lars.val)
-    df_state_lars.set_mode_and_reset(df_state_lars.order_mode)
-    for _ in range(it - 1):
-        df_state_lars.go_deeper()
-    if chart_mode == 'Pie Chart':
-        build_pie(pie_ax_lars, df_state_lars)
-    else:
-        build_list(pie_ax_lars, df_state_lars)
-    fig.canvas.draw_idle()
-
-def slider_scrapie_func(val):
-    it = int(slider_scrapie.val)
-    df_state_scrapie.set_mode_and_reset(df_state_scrapie.order_mode)
-    for _ in range(it - 1):
-        df_state_scrapie.go_deeper()
-    if chart_mode == 'Pie Chart':
-        build_pie(pie_ax_scrapie, df_state_scrapie)
-    else:
-        build_list(pie_ax_scrapie, df_state_scrapie)
-    fig.canvas.draw_idle()
+def slider_func(name):
+    state, slider, ax = states[name], sliders[name], pie_axes[name]
+    def on_changed(val):
+        state.show_iteration(int(slider.val))
+        if chart_mode == 'Pie Chart':
+            rebuilt = build_pie(ax, state)
+            blitter.update(pie_artists[ax].artists() + [ax.title], None if rebuilt else slider)
+        else:
+            build_list(ax, state)
+            blitter.update([])
+    return on_changed
 
 order_radio.on_clicked(order_radio_func)
 list_radio.on_clicked(list_radio_func)
 days_radio.on_clicked(days_radio_func)
-slider_lars.on_changed(slider_lars_func)
-slider_scrapie.on_changed(slider_scrapie_func)
+for name, slider in sliders.items():
+    slider.on_changed(scheduler.wrap(slider_func(name)))
 
 def on_pick(event):
     wedge = event.artist
     label = wedge.get_label()
-    if label == "Other":
-        if wedge.axes == pie_ax_lars:
-            df_state_lars.go_deeper()
-            build_pie(pie_ax_lars, df_state_lars)
-        elif wedge.axes == pie_ax_scrapie:
-            df_state_scrapie.go_deeper()
-            build_pie(pie_ax_scrapie, df_state_scrapie)
+    if label == "Other" and days_mode == 'Single Chart':
+        for name, state in states.items():
+            if wedge.axes == pie_axes[name]:
+                state.go_deeper()
+                build_pie(pie_axes[name], state)
         fig.canvas.draw_idle()
 
 order_radio.on_clicked(order_radio_func)
@@ -273,5 +337,9 @@ list_radio.on_clicked(list_radio_func)
 days_radio.on_clicked(days_radio_func)
 fig.canvas.mpl_connect('pick_event', on_pick)
 
+for mode in cube_filters:
+    for state in states.values():
+        background.add(state.precompute, mode)
+
 draw_charts()
 plt.show()
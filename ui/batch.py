@@ -0,0 +1,203 @@
+import os
+import re
+import sys
+import glob
+import json
+import math
+import runpy
+import hashlib
+import argparse
+import warnings
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(base_dir)
+
+from data.cache import export_file, source_stamp
+from data.dataset import streamer_names
+from data.near_misses import metrics
+
+scripts_dir = os.path.join(base_dir, 'scripts')
+shared_dirs = ['data', 'ui']
+default_output = os.path.join(base_dir, 'renders')
+manifest_name = 'manifest.json'
+min_chunk = 8
+
+def select(radio, label):
+    # Clicking the active option again would still recompute and redraw.
+    if radio.value_selected != label:
+        labels = [t.get_text() for t in radio.labels]
+        radio.set_active(labels.index(label))
+
+def pie_variants():
+    for mode in ('Most', 'Best [at]', 'Best [gold]', 'Worst [skips]'):
+        for streamer in streamer_names + ['Both']:
+            for i in range(11):
+                yield {'mode': mode, 'streamer': streamer, 'cutoff': 1 + i * 0.5}
+
+def apply_pie(ns, params):
+    select(ns['order_radio'], params['mode'])
+    select(ns['player_radio'], params['streamer'])
+    for state in ns['states'].values():
+        state.cutoff_slider.set_val(params['cutoff'])
+
+def stretch_variants():
+    # Picking 'Both' switches the view to Overlay, so it only exists there.
+    for duration in ('2', '3', '10', '20', '30', '60'):
+        for mode in ('Single', 'Overlay', 'Curve', 'Top 10'):
+            for streamer in streamer_names + ['Both'] if mode == 'Overlay' else streamer_names:
+                yield {'duration': duration, 'mode': mode, 'streamer': streamer}
+
+def apply_stretch(ns, params):
+    select(ns['radio3'], params['duration'])
+    select(ns['radio2'], params['streamer'])
+    select(ns['radio1'], params['mode'])
+
+def near_miss_variants(metric_names):
+    def variants():
+        steps = min(len(metrics[m]['batch_thresholds']) for m in metric_names)
+        for streamer in streamer_names + ['Both']:
+            for sort in ('Datetime', 'FinalTime'):
+                for i in range(steps):
+                    yield {'streamer': streamer, 'sort': sort, 'thresholds': [metrics[m]['batch_thresholds'][i] for m in metric_names]}
+    return variants
+
+def apply_near_miss(ns, params):
+    view = ns['view']
+    select(view.radio, params['streamer'])
+    select(view.sort_radio, params['sort'])
+    for panel, threshold in zip(view.panels, params['thresholds']):
+        panel.threshold_slider.set_val(threshold)
+
+charts = {
+    'map_styles_pie_charts.py': (pie_variants, apply_pie),
+    'best_times_plot.py': (stretch_variants, apply_stretch),
+    'near_misses_plot.py': (near_miss_variants(['pb_diff']), apply_near_miss),
+    'got_at_by_less_than_NNms_plot.py': (near_miss_variants(['diff']), apply_near_miss),
+    'near_miss_margins_plot.py': (near_miss_variants(['diff', 'pb_diff']), apply_near_miss),
+}
+
+def slug(value):
+    if isinstance(value, (list, tuple)):
+        return '-'.join(slug(v) for v in value)
+    if isinstance(value, float):
+        value = f"{value:g}"
+    return re.sub(r'[^a-z0-9.]+', '-', str(value).lower()).strip('-')
+
+def variant_name(params):
+    return '_'.join(slug(v) for v in params.values())
+
+def source_fingerprint(script):
+    # Everything a chart is drawn from: its script, the shared data and ui
+    # modules and the export it loads.
+    h = hashlib.sha1()
+    paths = [os.path.join(scripts_dir, script)]
+    for d in shared_dirs:
+        paths += sorted(glob.glob(os.path.join(base_dir, d, '*.py')))
+    for path in paths:
+        with open(path, 'rb') as f:
+            h.update(f.read())
+    h.update(source_stamp(export_file).tobytes())
+    return h.hexdigest()
+
+def output_key(fingerprint, params, dpi):
+    return hashlib.sha1(json.dumps([fingerprint, params, dpi], sort_keys=True).encode()).hexdigest()
+
+def load_manifest(out_dir):
+    try:
+        with open(os.path.join(out_dir, manifest_name)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_manifest(out_dir, manifest):
+    path = os.path.join(out_dir, manifest_name)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(path + '.tmp', path)
+
+def plan_jobs(out_dir, formats, dpi, workers, force, manifest):
+    jobs = []
+    skipped = 0
+    for script, (variants, _) in charts.items():
+        fingerprint = source_fingerprint(script)
+        stem = os.path.splitext(script)[0]
+        todo = []
+        for params in variants():
+            name = variant_name(params)
+            key = output_key(fingerprint, params, dpi)
+            outputs = [f"{stem}/{name}.{fmt}" for fmt in formats]
+            if not force and all(manifest.get(o) == key and os.path.exists(os.path.join(out_dir, o)) for o in outputs):
+                skipped += 1
+                continue
+            todo.append((params, outputs, key))
+        # Every job loads the script once, so a script is only split into as
+        # many jobs as there are workers, and never into tiny ones.
+        size = max(min_chunk, math.ceil(len(todo) / workers))
+        for i in range(0, len(todo), size):
+            jobs.append((script, todo[i:i + size]))
+    return jobs, skipped
+
+def render_chunk(script, chunk, out_dir, dpi):
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    # Layout warnings of the interactive scripts would repeat once per worker.
+    warnings.simplefilter('ignore', UserWarning)
+    ns = runpy.run_path(os.path.join(scripts_dir, script), run_name='__main__')
+    fig = plt.gcf()
+    apply = charts[script][1]
+    done = []
+    for params, outputs, key in chunk:
+        apply(ns, params)
+        for output in outputs:
+            path = os.path.join(out_dir, output)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fig.savefig(path, dpi=dpi)
+            done.append((output, key))
+    plt.close('all')
+    return done
+
+def render_all(out_dir=default_output, formats=('png',), dpi=100, workers=None, force=False):
+    workers = workers or os.cpu_count() or 1
+    os.makedirs(out_dir, exist_ok=True)
+    manifest = load_manifest(out_dir)
+    jobs, skipped = plan_jobs(out_dir, formats, dpi, workers, force, manifest)
+    total = sum(len(chunk) for _, chunk in jobs)
+    print(f"{total} charts to render, {skipped} unchanged.")
+    if not jobs:
+        return
+    # map_styles seeds its fallback colors with hash(style); a fixed hash
+    # seed in fresh worker processes keeps them the same across workers and
+    # across runs, so skipped outputs still match re-rendered ones.
+    os.environ['PYTHONHASHSEED'] = '0'
+    rendered = 0
+    try:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+            futures = {pool.submit(render_chunk, script, chunk, out_dir, dpi): (script, chunk) for script, chunk in jobs}
+            for future in as_completed(futures):
+                script, chunk = futures[future]
+                try:
+                    done = future.result()
+                except Exception as e:
+                    print(f"Failed to render {len(chunk)} charts of {script}: {e}")
+                    continue
+                manifest.update(done)
+                rendered += len(chunk)
+                print(f"{rendered}/{total} rendered ({script})")
+    finally:
+        save_manifest(out_dir, manifest)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render every chart variant to image files without opening windows.")
+    parser.add_argument('out_dir', nargs='?', default=default_output)
+    parser.add_argument('--format', nargs='+', default=['png'], choices=['png', 'svg'])
+    parser.add_argument('--dpi', type=int, default=100)
+    parser.add_argument('--jobs', type=int, default=None)
+    parser.add_argument('--force', action='store_true', help="re-render charts whose inputs have not changed")
+    args = parser.parse_args(argv)
+    render_all(args.out_dir, args.format, args.dpi, args.jobs, args.force)
+
+if __name__ == "__main__":
+    main()
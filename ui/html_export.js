@@ -0,0 +1,447 @@
+// Renders the pages written by html_export.py. All numbers come from the
+// embedded payload; controls only pick and slice the precomputed arrays.
+(function () {
+  var page = JSON.parse(document.getElementById('payload').textContent);
+  var app = document.getElementById('app');
+  var svgNS = 'http://www.w3.org/2000/svg';
+  var W = 960, H = 540;
+
+  function node(tag, attrs, parent, text) {
+    var e = tag === 'div' || tag === 'label' || tag === 'input' || tag === 'fieldset' ||
+      tag === 'legend' || tag === 'h1' || tag === 'span' ? document.createElement(tag) : document.createElementNS(svgNS, tag);
+    for (var k in attrs || {}) e.setAttribute(k, attrs[k]);
+    if (text !== undefined) e.textContent = text;
+    if (parent) parent.appendChild(e);
+    return e;
+  }
+
+  function newSvg(parent, width, height) {
+    return node('svg', {width: width || W, height: height || H, viewBox: '0 0 ' + (width || W) + ' ' + (height || H)}, parent);
+  }
+
+  function clear(e) {
+    while (e.firstChild) e.removeChild(e.firstChild);
+  }
+
+  function radios(parent, label, options, value, onChange) {
+    var box = node('fieldset', {}, parent);
+    node('legend', {}, box, label);
+    var name = 'r' + Math.random().toString(36).slice(2);
+    options.forEach(function (option) {
+      var l = node('label', {}, box);
+      var input = node('input', {type: 'radio', name: name, value: option}, l);
+      input.checked = option === value;
+      input.addEventListener('change', function () { onChange(option); });
+      l.appendChild(document.createTextNode(' ' + option + ' '));
+    });
+    return box;
+  }
+
+  function slider(parent, label, min, max, step, value, onInput) {
+    var box = node('fieldset', {}, parent);
+    node('legend', {}, box, label);
+    var input = node('input', {type: 'range', min: min, max: max, step: step, value: value}, box);
+    var shown = node('span', {}, box, ' ' + value);
+    input.addEventListener('input', function () {
+      shown.textContent = ' ' + input.value;
+      onInput(Number(input.value));
+    });
+    return input;
+  }
+
+  function niceMax(v) {
+    if (v <= 0) return 1;
+    var p = Math.pow(10, Math.floor(Math.log10(v)));
+    var steps = [1, 2, 2.5, 5, 10];
+    for (var i = 0; i < steps.length; i++) if (steps[i] * p >= v) return steps[i] * p;
+    return 10 * p;
+  }
+
+  function fmt(v) {
+    return Math.abs(v) >= 100 || v === Math.round(v) ? String(Math.round(v)) : v.toFixed(2);
+  }
+
+  // Axes box with y ticks; returns the functions that place data in it.
+  function axes(svg, o) {
+    var m = {l: 80, r: 20, t: o.top || 60, b: o.bottom || 150};
+    var w = W - m.l - m.r, h = H - m.t - m.b;
+    var x0 = o.xmin, x1 = o.xmax, y0 = o.ymin || 0, y1 = o.ymax;
+    var sx = function (x) { return m.l + (x - x0) / (x1 - x0 || 1) * w; };
+    var sy = function (y) { return m.t + h - (y - y0) / (y1 - y0 || 1) * h; };
+    node('rect', {x: m.l, y: m.t, width: w, height: h, fill: 'none', stroke: '#000'}, svg);
+    for (var i = 0; i <= 5; i++) {
+      var v = y0 + (y1 - y0) * i / 5, y = sy(v);
+      node('line', {x1: m.l - 4, x2: m.l, y1: y, y2: y, stroke: '#000'}, svg);
+      node('text', {x: m.l - 6, y: y + 4, 'text-anchor': 'end', 'font-size': 11}, svg, o.yfmt ? o.yfmt(v) : fmt(v));
+    }
+    if (o.ylabel) node('text', {x: 16, y: m.t + h / 2, 'text-anchor': 'middle', 'font-size': 12, transform: 'rotate(-90 16 ' + (m.t + h / 2) + ')'}, svg, o.ylabel);
+    if (o.xlabel) node('text', {x: m.l + w / 2, y: H - 8, 'text-anchor': 'middle', 'font-size': 12}, svg, o.xlabel);
+    if (o.title) node('text', {x: m.l + w / 2, y: 18, 'text-anchor': 'middle', 'font-size': 15}, svg, o.title);
+    return {sx: sx, sy: sy, m: m, w: w, h: h};
+  }
+
+  function xLabels(svg, a, positions, labels, colors, below) {
+    // Rotated tick labels; with too many bars to read they are left out and
+    // only the hover titles remain.
+    if (positions.length > 150) return;
+    positions.forEach(function (x, i) {
+      var px = a.sx(x), py = below ? a.m.t + a.h + 10 : a.m.t - 6;
+      var angle = below ? -90 : -45;
+      node('text', {x: px, y: py, 'text-anchor': below ? 'end' : 'start', 'font-size': 8,
+        fill: colors ? colors[i] : '#000', transform: 'rotate(' + angle + ' ' + px + ' ' + py + ')'}, svg, labels[i]);
+    });
+  }
+
+  function barChart(svg, o) {
+    clear(svg);
+    var n = o.heights.length;
+    if (!n) {
+      node('text', {x: W / 2, y: H / 2, 'text-anchor': 'middle', 'font-size': 14}, svg, 'No events found under current criteria');
+      return;
+    }
+    var a = axes(svg, {xmin: -0.5, xmax: n - 0.5, ymax: niceMax(Math.max.apply(null, o.heights)), ylabel: o.ylabel,
+      xlabel: 'Map Title', title: o.title, top: 110});
+    var bw = a.w / n;
+    o.heights.forEach(function (v, i) {
+      var y = a.sy(v);
+      var r = node('rect', {x: a.sx(i) - bw * 0.4, y: y, width: bw * 0.8, height: a.m.t + a.h - y, fill: o.colors[i]}, svg);
+      node('title', {}, r, o.labels[i] + ': ' + v);
+    });
+    var xs = o.labels.map(function (_, i) { return i; });
+    xLabels(svg, a, xs, o.labels, null, true);
+    if (o.groups) xLabels(svg, a, o.groups[0], o.groups[1], null, false);
+  }
+
+  function lineChart(svg, o) {
+    clear(svg);
+    var xs = [], ys = [];
+    o.series.forEach(function (s) { xs = xs.concat(s.x); ys = ys.concat(s.y); });
+    if (!xs.length) {
+      node('text', {x: W / 2, y: H / 2, 'text-anchor': 'middle', 'font-size': 14}, svg, 'No data');
+      return;
+    }
+    var ymin = Math.min.apply(null, ys), ymax = Math.max.apply(null, ys), pad = (ymax - ymin) * 0.05 || 0.5;
+    var a = axes(svg, {xmin: o.xmin !== undefined ? o.xmin : Math.min.apply(null, xs), xmax: Math.max.apply(null, xs),
+      ymin: o.ymin !== undefined ? o.ymin : ymin - pad, ymax: ymax + pad, ylabel: o.ylabel, xlabel: o.xlabel,
+      title: o.title, yfmt: o.yfmt, top: o.ticks ? 90 : 60});
+    if (o.vline !== undefined) {
+      node('line', {x1: a.sx(o.vline), x2: a.sx(o.vline), y1: a.m.t, y2: a.m.t + a.h, stroke: '#888', 'stroke-dasharray': '5,4'}, svg);
+    }
+    o.series.forEach(function (s) {
+      var pts = s.x.map(function (x, i) { return a.sx(x) + ',' + a.sy(s.y[i]); }).join(' ');
+      node('polyline', {points: pts, fill: 'none', stroke: s.color, 'stroke-width': 1.5, opacity: s.alpha || 1}, svg);
+      if (s.markers) s.x.forEach(function (x, i) {
+        var c = node('circle', {cx: a.sx(x), cy: a.sy(s.y[i]), r: 3, fill: s.color, opacity: s.alpha || 1}, svg);
+        if (s.labels) node('title', {}, c, s.labels[i]);
+      });
+    });
+    if (o.ticks) {
+      xLabels(svg, a, o.ticks.x, o.ticks.labels, o.ticks.colors, true);
+      xLabels(svg, a, o.ticks.x, o.ticks.x.map(function (v) { return v.toFixed(1); }), o.ticks.colors, false);
+    }
+  }
+
+  // Bars grouped by rank, one per series, with the stretch start above each.
+  function rankChart(svg, o) {
+    clear(svg);
+    var heights = [];
+    o.series.forEach(function (s) { heights = heights.concat(s.heights); });
+    var a = axes(svg, {xmin: 0.5, xmax: o.k + 0.5, ymax: niceMax(Math.max.apply(null, heights.concat([1])) * 1.3),
+      ylabel: o.ylabel, xlabel: o.xlabel, title: o.title, bottom: 60});
+    var bw = a.w / o.k * 0.8 / o.series.length;
+    for (var rank = 1; rank <= o.k; rank++) {
+      node('text', {x: a.sx(rank), y: a.m.t + a.h + 16, 'text-anchor': 'middle', 'font-size': 11}, svg, String(rank));
+    }
+    o.series.forEach(function (s, j) {
+      s.heights.forEach(function (v, i) {
+        var x = a.sx(i + 1) + (j - (o.series.length - 1) / 2) * bw, y = a.sy(v);
+        var r = node('rect', {x: x - bw / 2, y: y, width: bw, height: a.m.t + a.h - y, fill: s.color}, svg);
+        node('title', {}, r, s.name + ' #' + (i + 1) + ': ' + v + ' ATs from ' + s.labels[i]);
+        node('text', {x: x + 3, y: y - 4, 'font-size': 8, transform: 'rotate(-90 ' + (x + 3) + ' ' + (y - 4) + ')'}, svg, s.labels[i]);
+      });
+    });
+  }
+
+  // Wedges start at 90 degrees and run counterclockwise, like Axes.pie.
+  function pieChart(svg, o) {
+    clear(svg);
+    var size = 460, cx = size / 2 + 70, cy = size / 2 + 40, r = size / 2 - 40;
+    node('text', {x: cx, y: 18, 'text-anchor': 'middle', 'font-size': 14}, svg, o.title);
+    var total = o.sizes.reduce(function (s, v) { return s + v; }, 0);
+    if (!total) return;
+    var theta = 0.25;
+    o.sizes.forEach(function (v, i) {
+      var frac = v / total, t1 = theta * 2 * Math.PI, t2 = (theta + frac) * 2 * Math.PI;
+      var p = function (t, d) { return [cx + d * Math.cos(t), cy - d * Math.sin(t)]; };
+      var a = p(t1, r), b = p(t2, r);
+      var shape = frac >= 0.9999
+        ? node('circle', {cx: cx, cy: cy, r: r, fill: o.colors[i]}, svg)
+        : node('path', {d: 'M' + cx + ',' + cy + 'L' + a + 'A' + r + ',' + r + ' 0 ' + (frac > 0.5 ? 1 : 0) + ' 0 ' + b + 'Z', fill: o.colors[i]}, svg);
+      node('title', {}, shape, o.labels[i] + ': ' + v);
+      var tm = (t1 + t2) / 2, l = p(tm, r * 1.1), q = p(tm, r * 0.8);
+      node('text', {x: l[0], y: l[1], 'text-anchor': Math.cos(tm) > 0 ? 'start' : 'end', 'font-size': 10}, svg, o.labels[i]);
+      if (o.texts[i]) node('text', {x: q[0], y: q[1], 'text-anchor': 'middle', 'font-size': 9}, svg, o.texts[i]);
+      theta += frac;
+    });
+  }
+
+  function mix(a, b, t) {
+    return a.map(function (v, i) { return v + (b[i] - v) * t; });
+  }
+
+  function rgb(hex) {
+    return [1, 3, 5].map(function (i) { return parseInt(hex.slice(i, i + 2), 16) / 255; });
+  }
+
+  function css(c) {
+    return 'rgb(' + c.map(function (v) { return Math.round(v * 255); }).join(',') + ')';
+  }
+
+  // Light to dark shades of a streamer color, one per day.
+  function palette(hex, n) {
+    var base = rgb(hex);
+    var light = base.map(function (v) { return Math.min(1, v + 0.5); });
+    var dark = base.map(function (v) { return Math.max(0, v - 0.5); });
+    var out = [];
+    for (var i = 0; i < n; i++) {
+      var t = i / Math.max(n - 1, 1);
+      out.push(css(t < 0.5 ? mix(light, base, t * 2) : mix(base, dark, t * 2 - 1)));
+    }
+    return out;
+  }
+
+  function dayLabel(day) {
+    return new Date(day * 86400000).toISOString().slice(0, 10);
+  }
+
+  function upperBound(sorted, v) {
+    var lo = 0, hi = sorted.length;
+    while (lo < hi) {
+      var mid = (lo + hi) >> 1;
+      if (sorted[mid] <= v) lo = mid + 1; else hi = mid;
+    }
+    return lo;
+  }
+
+  var pages = {};
+
+  pages.pie = function (d) {
+    var names = Object.keys(d.streamers);
+    var state = {mode: d.modes[0], focus: 'Both', cutoff: 4, iteration: {}};
+    var controls = node('div', {'class': 'controls'}, app);
+    var charts = node('div', {}, app);
+    var panels = {};
+    names.forEach(function (name) {
+      var panel = node('div', {'class': 'panel'}, charts);
+      state.iteration[name] = 1;
+      panels[name] = {div: panel, svg: newSvg(panel, 600, 560), controls: node('div', {'class': 'controls'}, panel)};
+      panels[name].slider = slider(panels[name].controls, 'Iteration', 1, 1, 1, 1, function (v) {
+        state.iteration[name] = v;
+        draw();
+      });
+    });
+    radios(controls, 'Order', d.modes, state.mode, function (v) { state.mode = v; reset(); });
+    radios(controls, 'Streamer', names.concat(['Both']), state.focus, function (v) { state.focus = v; draw(); });
+    slider(controls, 'Cutoff (%)', d.cutoffs[0], d.cutoffs[d.cutoffs.length - 1], d.cutoffs[1] - d.cutoffs[0], d.cutoffs[state.cutoff], function (v) {
+      state.cutoff = d.cutoffs.indexOf(v);
+      reset();
+    });
+
+    function reset() {
+      Object.keys(panels).forEach(function (name) {
+        var levels = d.streamers[name].modes[state.mode].levels[state.cutoff];
+        panels[name].slider.max = levels.length;
+        panels[name].slider.value = 1;
+        state.iteration[name] = 1;
+      });
+      draw();
+    }
+
+    function draw() {
+      Object.keys(panels).forEach(function (name) {
+        var p = panels[name], s = d.streamers[name].modes[state.mode];
+        p.div.style.display = state.focus === 'Both' || state.focus === name ? '' : 'none';
+        var level = s.levels[state.cutoff][state.iteration[name] - 1];
+        var total = {}, overall = 0;
+        s.total[0].forEach(function (code, i) { total[code] = s.total[1][i]; overall += s.total[1][i]; });
+        var items = level[0].map(function (code, i) { return [code, level[1][i]]; });
+        items.sort(function (a, b) { return b[1] - a[1]; });
+        var sizes = items.map(function (it) { return it[1]; });
+        var labels = items.map(function (it) { return d.styles[it[0]]; });
+        var colors = items.map(function (it) { return d.style_colors[name][it[0]]; });
+        var sum = sizes.reduce(function (a, b) { return a + b; }, 0) + level[2];
+        var texts = items.map(function (it) {
+          return (100 * it[1] / sum).toFixed(1) + '% (' + (overall ? 100 * (total[it[0]] || 0) / overall : 0).toFixed(1) + '%)';
+        });
+        if (level[2] > 0) {
+          sizes.push(level[2]);
+          labels.push('Other');
+          colors.push(d.streamers[name].other_color);
+          texts.push('');
+        }
+        pieChart(p.svg, {sizes: sizes, labels: labels, colors: colors, texts: texts,
+          title: name + ' (Iter ' + state.iteration[name] + ') - ' + state.mode + ', cutoff ' + d.cutoffs[state.cutoff] + '%'});
+      });
+    }
+    reset();
+  };
+
+  // The views of best_times_plot: Single and Overlay show the best stretch
+  // of the duration, Curve the most ATs per window length and Top 10 the
+  // best non-overlapping stretches.
+  pages.stretches = function (d) {
+    var all = Object.keys(d.streamers);
+    var state = {view: 'Single', streamer: all[0], duration: d.durations.indexOf(10) >= 0 ? d.durations.indexOf(10) : 0};
+    var controls = node('div', {'class': 'controls'}, app);
+    var svg = newSvg(app);
+    radios(controls, 'View', ['Single', 'Overlay', 'Curve', 'Top ' + d.top_k], state.view, function (v) { state.view = v; draw(); });
+    radios(controls, 'Streamer', all.concat(['Both']), state.streamer, function (v) { state.streamer = v; draw(); });
+    radios(controls, 'Duration (min)', d.durations.map(String), String(d.durations[state.duration]), function (v) {
+      state.duration = d.durations.indexOf(Number(v));
+      draw();
+    });
+
+    function names() {
+      return state.streamer === 'Both' ? all : [state.streamer];
+    }
+
+    function draw() {
+      var duration = d.durations[state.duration];
+      if (state.view === 'Curve') {
+        var minutes = d.streamers[all[0]].curve.map(function (_, i) { return i + 1; });
+        lineChart(svg, {
+          series: names().map(function (n) { return {x: minutes, y: d.streamers[n].curve, color: d.streamers[n].color}; }),
+          xlabel: 'Window length (minutes)', ylabel: 'Max ATs', vline: duration, ymin: 0, xmin: 1,
+          title: 'Most ATs in any window'
+        });
+        return;
+      }
+      if (state.view !== 'Single' && state.view !== 'Overlay') {
+        rankChart(svg, {
+          k: d.top_k, xlabel: 'Rank', ylabel: 'ATs',
+          title: 'Top ' + d.top_k + ' non-overlapping ' + duration + '-min stretches',
+          series: names().map(function (n) {
+            var top = d.streamers[n].top[state.duration];
+            return {name: n, heights: top[0], labels: top[1], color: d.streamers[n].color};
+          })
+        });
+        return;
+      }
+      // Single shows one streamer; Overlay adds all the others, faded
+      // unless 'Both' is picked.
+      var shown, tag;
+      if (state.view === 'Single') {
+        shown = [[state.streamer === 'Both' ? all[0] : state.streamer, 1]];
+        tag = '(' + shown[0][0] + ')';
+      } else if (state.streamer === 'Both') {
+        shown = all.map(function (n) { return [n, 1]; });
+        tag = '(Both)';
+      } else {
+        shown = [[state.streamer, 1]].concat(all.filter(function (n) { return n !== state.streamer; }).map(function (n) { return [n, 0.3]; }));
+        tag = '(Overlay)';
+      }
+      var series = [], tx = [], tl = [], tc = [], count = 0;
+      shown.forEach(function (item) {
+        var n = item[0], s = d.streamers[n].stretches[state.duration];
+        var labels = s[2].map(function (c) { return d.titles[c]; });
+        series.push({x: s[0], y: s[1], color: d.streamers[n].color, markers: true, labels: labels, alpha: item[1]});
+        tx = tx.concat(s[0]);
+        tl = tl.concat(labels);
+        tc = tc.concat(s[0].map(function () { return d.streamers[n].color; }));
+        count += s[0].length;
+      });
+      lineChart(svg, {
+        series: series, ticks: {x: tx, labels: tl, colors: tc}, ylabel: 'Time (min)',
+        yfmt: function (v) { return v.toFixed(2) + ' (' + Math.floor(v * 60) + ')'; },
+        title: 'Best ' + duration + '-min stretch ' + tag + ' : ' + count + ' ATs'
+      });
+    }
+    draw();
+  };
+
+  pages.near_misses = function (d) {
+    var names = Object.keys(d.streamers);
+    var state = {streamer: names[0], sort: 'Datetime'};
+    var controls = node('div', {'class': 'controls'}, app);
+    radios(controls, 'Streamer', names.concat(['Both']), state.streamer, function (v) { state.streamer = v; drawAll(); });
+    radios(controls, 'Sort', ['Datetime', 'FinalTime'], state.sort, function (v) { state.sort = v; drawAll(); });
+    var panels = d.metrics.map(function (metric) {
+      var panel = {metric: metric, threshold: Math.min(10, metric.max_threshold)};
+      var div = node('div', {}, app);
+      panel.svg = newSvg(div);
+      slider(node('div', {'class': 'controls'}, div), 'Threshold', 0, metric.max_threshold, 1, panel.threshold, function (v) {
+        panel.threshold = v;
+        draw(panel);
+      });
+      return panel;
+    });
+
+    // The rows of one streamer, or of all of them for 'Both', sorted by
+    // margin (ties in time order) with their day, streamer and datetime order.
+    function rows(metric, streamer) {
+      var cache = metric.rows || (metric.rows = {});
+      if (cache[streamer]) return cache[streamer];
+      var names = streamer === 'Both' ? Object.keys(metric.groups) : [streamer];
+      var all = [];
+      names.forEach(function (name) {
+        var g = metric.groups[name];
+        g.margin.forEach(function (m, i) { all.push([m, g.time[i], g.title[i], name]); });
+      });
+      if (names.length > 1) all.sort(function (a, b) { return a[0] - b[0] || a[1] - b[1]; });
+      var r = {
+        margin: all.map(function (x) { return x[0]; }),
+        day: all.map(function (x) { return d.base_day + Math.floor(x[1] / 86400000); }),
+        title: all.map(function (x) { return x[2]; }),
+        streamer: all.map(function (x) { return x[3]; }),
+        order: all.map(function (x, i) { return i; }).sort(function (a, b) { return all[a][1] - all[b][1]; })
+      };
+      return (cache[streamer] = r);
+    }
+
+    function draw(panel) {
+      var g = rows(panel.metric, state.streamer);
+      var n = upperBound(g.margin, panel.threshold);
+      var idx = [];
+      if (state.sort === 'FinalTime') {
+        for (var i = 0; i < n; i++) idx.push(i);
+      } else {
+        g.order.forEach(function (i) { if (i < n) idx.push(i); });
+      }
+      var colors;
+      if (state.streamer === 'Both') {
+        colors = idx.map(function (i) { return d.streamers[g.streamer[i]]; });
+      } else {
+        var days = Array.from(new Set(idx.map(function (i) { return g.day[i]; }))).sort(function (a, b) { return a - b; });
+        var shades = palette(d.streamers[state.streamer], days.length);
+        colors = idx.map(function (i) { return shades[days.indexOf(g.day[i])]; });
+      }
+      var groups = null;
+      if (state.sort !== 'FinalTime' && idx.length) {
+        var pos = [], labels = [], start = 0;
+        for (var k = 1; k <= idx.length; k++) {
+          if (k === idx.length || g.day[idx[k]] !== g.day[idx[start]]) {
+            pos.push((start + k - 1) / 2);
+            labels.push(dayLabel(g.day[idx[start]]));
+            start = k;
+          }
+        }
+        groups = [pos, labels];
+      }
+      barChart(panel.svg, {
+        heights: idx.map(function (i) { return g.margin[i]; }),
+        labels: idx.map(function (i) { return d.titles[g.title[i]]; }),
+        colors: colors, groups: groups, ylabel: panel.metric.ylabel,
+        title: panel.metric.title.replace('{threshold}', panel.threshold).replace('{streamer}', state.streamer)
+      });
+    }
+
+    function drawAll() {
+      panels.forEach(draw);
+    }
+    drawAll();
+  };
+
+  document.title = page.title;
+  node('h1', {}, app, page.title);
+  pages[page.kind](page.data);
+})();
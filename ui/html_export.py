@@ -0,0 +1,204 @@
+import os
+import sys
+import json
+import zlib
+import random
+import argparse
+
+import numpy as np
+
+base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(base_dir)
+
+from data.tag_colors import tag_colors
+from data.dataset import dataset, streamer_names, streamer_color, day_ms
+from data.styles import mode_filters, style_level
+from data.near_misses import engine, metrics
+from data.stretches import timestamps_ms, best_window, best_count_curve, top_windows, minute_ms
+
+default_output = os.path.join(base_dir, 'renders', 'html')
+script_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'html_export.js')
+
+pie_modes = ('Most', 'Best [at]', 'Best [gold]', 'Worst [skips]')
+pie_cutoffs = [1 + i * 0.5 for i in range(11)]
+pie_max_levels = 10
+stretch_durations = (2, 3, 10, 20, 30, 60)
+curve_minutes = 60
+top_k = 10
+
+class Table:
+    # Strings are sent once and referred to by their position.
+    def __init__(self):
+        self.values = []
+        self.codes = {}
+
+    def code(self, value):
+        if value not in self.codes:
+            self.codes[value] = len(self.values)
+            self.values.append(value)
+        return self.codes[value]
+
+    def encode(self, values):
+        return [self.code(v) for v in values]
+
+def hex_color(rgb):
+    return '#{:02x}{:02x}{:02x}'.format(*rgb)
+
+def style_color(style, base_color):
+    # Same as get_color in map_styles_pie_charts, but the fallback jitter is
+    # seeded with a stable hash so a page looks the same on every export.
+    c = tag_colors.get(style)
+    if c:
+        if len(c) == 6 and all(ch in '0123456789ABCDEFabcdef' for ch in c):
+            return '#' + c
+        return c
+    rng = random.Random(zlib.crc32(style.encode()))
+    jitter = [rng.randint(-20, 20) for _ in range(3)]
+    return hex_color(max(0, min(255, b + j)) for b, j in zip(base_color, jitter))
+
+def encode_counts(styles, counts):
+    return [styles.encode(counts.keys()), [int(v) for v in counts.values()]]
+
+def pie_payload():
+    # Every drill-down level of every (streamer, mode, cutoff), as style
+    # codes and counts. Its size depends on the number of styles only.
+    index = dataset.style_index
+    styles = Table()
+    result = {'modes': pie_modes, 'cutoffs': pie_cutoffs, 'streamers': {}}
+    for streamer in streamer_names:
+        rows = index.positions(dataset.streamer(streamer).index)
+        modes = {}
+        for mode in pie_modes:
+            filters = mode_filters(mode)
+            total = {} if filters is None else index.counts(rows, **filters)
+            by_cutoff = []
+            for cutoff in pie_cutoffs:
+                levels = []
+                level_rows = rows
+                while level_rows is not None and len(levels) < pie_max_levels:
+                    counts, other, level_rows = style_level(index, level_rows, mode, cutoff / 100)
+                    levels.append(encode_counts(styles, counts) + [int(other)])
+                by_cutoff.append(levels)
+            modes[mode] = {'total': encode_counts(styles, total), 'levels': by_cutoff}
+        result['streamers'][streamer] = {
+            'color': hex_color(streamer_color(streamer)),
+            'other_color': style_color("Other", streamer_color(streamer)),
+            'modes': modes,
+        }
+    result['styles'] = styles.values
+    result['style_colors'] = {
+        streamer: [style_color(s, streamer_color(streamer)) for s in styles.values] for streamer in result['streamers']
+    }
+    return result
+
+def stretch_payload():
+    # The best stretch of each duration (only the runs inside it), the
+    # top_k non-overlapping stretches as AT counts and start times, and the
+    # max-ATs-per-window curve, per streamer.
+    df = dataset.df
+    df_at = df[df['medal'] == 'at'].sort_values('datetime').reset_index(drop=True)
+    titles = Table()
+    result = {'durations': stretch_durations, 'curve_minutes': curve_minutes, 'top_k': top_k, 'streamers': {}}
+    for streamer in streamer_names:
+        ats = df_at[df_at['streamer'] == streamer].reset_index(drop=True)
+        ts = timestamps_ms(ats['datetime'])
+        stretches = []
+        top = []
+        for duration in stretch_durations:
+            windows = top_windows(ts, duration * minute_ms, top_k)
+            top.append([
+                [end - start + 1 for start, end in windows],
+                [ats['datetime'].iloc[start].strftime('%m-%d %H:%M') for start, _ in windows],
+            ])
+            window = best_window(ts, duration * minute_ms)
+            if window is None:
+                stretches.append([[], [], []])
+                continue
+            start, end = window
+            part = ats.iloc[start:end + 1]
+            offsets = np.round((ts[start:end + 1] - ts[start]) / minute_ms, 2)
+            times = np.round(part['timeSpent'].to_numpy() / 60000, 4)
+            stretches.append([offsets.tolist(), times.tolist(), titles.encode(part['mapTitle'])])
+        result['streamers'][streamer] = {
+            'color': hex_color(streamer_color(streamer)),
+            'curve': best_count_curve(ts, max(curve_minutes, max(stretch_durations))).tolist(),
+            'stretches': stretches,
+            'top': top,
+        }
+    result['titles'] = titles.values
+    return result
+
+def near_miss_payload(metric_names):
+    # Per metric and streamer only the rows a threshold slider can reach,
+    # already sorted by margin, with their time in ms after 'base_day'.
+    # 'Both' is merged from these on the page instead of sent again.
+    df = dataset.df
+    titles = Table()
+    base_day = int(dataset.timestamps.min()) // day_ms if len(df) else 0
+    result = {'metrics': [], 'streamers': {}, 'base_day': base_day}
+    for name in streamer_names:
+        result['streamers'][name] = hex_color(streamer_color(name))
+    for metric in metric_names:
+        info = metrics[metric]
+        by_streamer = {}
+        for name in streamer_names:
+            nm = engine.index(metric, name)
+            n = nm.count(info['max_threshold'])
+            rows = nm.rows_by_diff[:n]
+            by_streamer[name] = {
+                'margin': nm.diff[:n].astype(np.int64).tolist(),
+                'time': (dataset.timestamps[rows] - base_day * day_ms).tolist(),
+                'title': titles.encode(df['mapTitle'].to_numpy()[rows]),
+            }
+        result['metrics'].append({
+            'ylabel': info['ylabel'],
+            'title': info['title'],
+            'max_threshold': info['max_threshold'],
+            'groups': by_streamer,
+        })
+    result['titles'] = titles.values
+    return result
+
+pages = {
+    'map_styles_pie_charts': ("Map styles", 'pie', pie_payload),
+    'best_times_plot': ("Best stretches", 'stretches', stretch_payload),
+    'near_misses_plot': ("Near misses", 'near_misses', lambda: near_miss_payload(['pb_diff'])),
+    'got_at_by_less_than_NNms_plot': ("Got AT by less than N ms", 'near_misses', lambda: near_miss_payload(['diff'])),
+    'near_miss_margins_plot': ("Near-miss margins", 'near_misses', lambda: near_miss_payload(['diff', 'pb_diff'])),
+}
+
+def render_page(title, kind, payload):
+    with open(script_file) as f:
+        script = f.read()
+    data = json.dumps({'kind': kind, 'title': title, 'data': payload}, separators=(',', ':'))
+    # Keep a '</script>' in a map title from ending the payload early.
+    data = data.replace('</', '<\\/')
+    return (
+        '<!DOCTYPE html>\n<html>\n<head>\n<meta charset="utf-8">\n'
+        f'<title>{title}</title>\n'
+        '<style>body{font-family:sans-serif;margin:16px}.controls{display:flex;flex-wrap:wrap;gap:24px;margin:8px 0}'
+        '.controls fieldset{border:1px solid #ccc}.panel{display:inline-block;vertical-align:top}</style>\n'
+        '</head>\n<body>\n<div id="app"></div>\n'
+        f'<script type="application/json" id="payload">{data}</script>\n'
+        f'<script>\n{script}</script>\n</body>\n</html>\n'
+    )
+
+def export_pages(out_dir=default_output, names=None):
+    os.makedirs(out_dir, exist_ok=True)
+    for name in names or pages:
+        title, kind, payload = pages[name]
+        path = os.path.join(out_dir, name + '.html')
+        html = render_page(title, kind, payload())
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(html)
+        print(f"Wrote {path} ({len(html) // 1024} KiB)")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write each chart as a self-contained interactive HTML page.")
+    parser.add_argument('out_dir', nargs='?', default=default_output)
+    parser.add_argument('--page', nargs='+', choices=list(pages), default=None)
+    args = parser.parse_args(argv)
+    export_pages(args.out_dir, args.page)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+import os
+import sys
+import gc
+import runpy
+import importlib
+import signal
+import traceback
+
+def warm_up():
+    # Everything the charts share: the libraries and the loaded export with
+    # its indexes. Nothing here may open a window. The modules are imported
+    # only so forked children find them loaded.
+    for module in ('numpy', 'pandas', 'matplotlib.pyplot', 'matplotlib.widgets'):
+        importlib.import_module(module)
+    from data.dataset import dataset
+    dataset.df
+    dataset.timestamps
+    dataset.style_index.row_bits
+
+def refresh():
+    # Picks up runs the tracker appended since the data was loaded. If that
+    # fails (say, the export is halfway written) the loaded data is kept.
+    from data.dataset import dataset
+    try:
+        dataset.refresh()
+    except Exception:
+        traceback.print_exc()
+
+def run_script(path):
+    sys.argv = [path]
+    runpy.run_path(path, run_name='__main__')
+
+def run_child(path):
+    try:
+        run_script(path)
+    except BaseException:
+        traceback.print_exc()
+        os._exit(1)
+    os._exit(0)
+
+def reap():
+    try:
+        while os.waitpid(-1, os.WNOHANG)[0]:
+            pass
+    except ChildProcessError:
+        pass
+
+def serve(requests, replies):
+    # The warm process: reads script paths, one per line, forks a child for
+    # each and replies with its pid. It ends when the launcher closes the pipe.
+    # Ctrl+C in the launcher's terminal is for the launcher and the charts.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    warm_up()
+    # Keep the loaded objects out of the collector's bookkeeping so children
+    # do not touch (and copy) their pages when they collect.
+    gc.freeze()
+    with os.fdopen(requests) as r, os.fdopen(replies, 'w') as w:
+        for line in r:
+            reap()
+            refresh()
+            pid = os.fork()
+            if pid == 0:
+                r.close()
+                w.close()
+                signal.signal(signal.SIGINT, signal.default_int_handler)
+                run_child(line.rstrip('\n'))
+            w.write(f"{pid}\n")
+            w.flush()
+    os._exit(0)
+
+class Launcher:
+    # Runs scripts without paying for imports and the export load again.
+    # Where fork exists, a warm process is forked before any GUI is created;
+    # every script is forked from it and inherits the loaded data
+    # copy-on-write, so several charts can be open at once. Elsewhere the
+    # data is loaded once in this process and scripts run here, one at a time.
+    def __init__(self):
+        self.forking = hasattr(os, 'fork')
+        self.pid = None
+        self.requests = None
+        self.replies = None
+
+    def start(self):
+        if not self.forking:
+            warm_up()
+            return
+        requests_r, requests_w = os.pipe()
+        replies_r, replies_w = os.pipe()
+        sys.stdout.flush()
+        sys.stderr.flush()
+        self.pid = os.fork()
+        if self.pid == 0:
+            os.close(requests_w)
+            os.close(replies_r)
+            try:
+                serve(requests_r, replies_w)
+            except BaseException:
+                traceback.print_exc()
+            os._exit(1)
+        os.close(requests_r)
+        os.close(replies_w)
+        self.requests = os.fdopen(requests_w, 'w')
+        self.replies = os.fdopen(replies_r)
+
+    def run(self, path):
+        # Returns the pid of the forked script, or None once it has run here.
+        if not self.forking:
+            import matplotlib.pyplot as plt
+            refresh()
+            try:
+                run_script(path)
+            finally:
+                plt.close('all')
+            return None
+        self.requests.write(path + '\n')
+        self.requests.flush()
+        return int(self.replies.readline())
+
+    def stop(self):
+        if self.requests is not None:
+            self.requests.close()
+            self.replies.close()
+            os.waitpid(self.pid, 0)
+            self.requests = None
@@ -0,0 +1,156 @@
+import numpy as np
+import matplotlib.pyplot as plt
+import matplotlib.colors as mcolors
+from matplotlib.widgets import Slider, RadioButtons
+
+from data.dataset import dataset, streamer_names, streamer_color
+from data.near_misses import engine, metrics, day_groups
+from ui.render import Blitter, BarSeries
+from ui.scheduler import FrameScheduler
+
+initial_threshold = 10
+panel_size = (12, 6)
+stacked_panel_height = 8
+
+def generate_palette(base_rgb, n):
+    lighten = tuple(min(1, c + 0.5) for c in base_rgb)
+    darken  = tuple(max(0, c - 0.5) for c in base_rgb)
+    cmap = mcolors.LinearSegmentedColormap.from_list('custom', [lighten, base_rgb, darken])
+    return [cmap(i/max(n-1, 1)) for i in range(n)]
+
+def streamer_rgb():
+    # One row per streamer code of the 'streamer' column; the last row, gray,
+    # is what code -1 (a player who is no streamer) picks.
+    return np.array([[c/255 for c in streamer_color(name)] for name in streamer_names] + [[0.5, 0.5, 0.5]])
+
+def panel_height(n):
+    return panel_size[1] if n == 1 else stacked_panel_height
+
+def panel_rect(rect, i, n):
+    # Layouts are written for a single 12x6 panel. With several metrics the
+    # panels are stacked, each one taller so the rotated map titles of one
+    # panel clear the day labels of the next, and rects keep their distance
+    # from the top of their own panel.
+    left, bottom, width, height = rect
+    figure_height = panel_height(n) * n
+    top_of_panel = figure_height - panel_height(n) * i
+    y = top_of_panel - panel_size[1] * (1 - bottom)
+    return [left, y / figure_height, width, panel_size[1] * height / figure_height]
+
+class MetricPanel:
+    def __init__(self, view, metric, index):
+        self.view = view
+        self.metric = metric
+        fig, n = view.fig, len(view.metric_names)
+        self.ax = fig.add_axes(panel_rect([0.18, 0.25, 0.7, 0.63], index, n))
+        self.ax_top = self.ax.twiny()
+        self.bars = BarSeries(self.ax)
+        self.shown = None
+        self.threshold_slider = Slider(
+            fig.add_axes(panel_rect([0.9, 0.25, 0.02, 0.65], index, n)),
+            'Threshold', 0, metrics[metric]['max_threshold'], valinit=initial_threshold,
+            orientation='vertical', valstep=1
+        )
+        self.threshold_slider.on_changed(view.scheduler.wrap(self.update_plot))
+        view.blitter.add_slider(self.threshold_slider)
+
+    def update_plot(self, *args):
+        thresh = int(self.threshold_slider.val)
+        rows, days = engine.select(self.metric, self.view.streamers(), thresh, self.view.sort_method)
+        # Most ticks of a wide threshold range select the same rows; then only
+        # the title and the slider change and can be blitted.
+        shown = (self.view.current_streamer, self.view.sort_method, len(rows))
+        if shown == self.shown and len(rows) > 0:
+            self.set_title(thresh)
+            self.view.blitter.update([self.ax.title], self.threshold_slider)
+            return
+        self.shown = shown
+        self.plot_bars(rows, days, thresh)
+
+    def set_title(self, thresh):
+        title = metrics[self.metric]['title'].format(threshold=thresh, streamer=self.view.current_streamer)
+        self.ax.set_title(title)
+
+    def plot_bars(self, rows, days, thresh):
+        ax, ax_top = self.ax, self.ax_top
+        current_streamer = self.view.current_streamer
+
+        if len(rows) == 0:
+            ax.clear()
+            ax_top.clear()
+            ax.set_title("No events found under current criteria")
+            self.view.blitter.update([])
+            return
+
+        filtered_data = dataset.df.iloc[rows]
+        if current_streamer != "Both":
+            unique_days, day_codes = np.unique(days, return_inverse=True)
+            base_color = tuple(c/255 for c in streamer_color(current_streamer))
+            palette = generate_palette(base_color, len(unique_days))
+            bar_colors = [palette[code] for code in day_codes]
+        else:
+            bar_colors = streamer_rgb()[filtered_data['streamer'].cat.codes.to_numpy()]
+
+        x = np.arange(len(rows))
+        heights = engine.values(self.metric)[rows]
+        map_names = filtered_data['mapTitle'].values
+
+        self.bars.update(heights, bar_colors)
+        ax.set_xticks(x)
+        ax.set_xticklabels(map_names, rotation=90, fontsize=8)
+        ax.set_xlim(-0.5, len(rows)-0.5)
+        ax.set_ylabel(metrics[self.metric]['ylabel'])
+        ax.set_xlabel("Map Title")
+        self.set_title(thresh)
+
+        if self.view.sort_method != 'FinalTime':
+            day_boundaries, day_labels = day_groups(days)
+            ax_top.set_xticks(day_boundaries)
+            ax_top.set_xticklabels(day_labels, rotation=45, ha='right', fontsize=8)
+            ax_top.set_xlim(ax.get_xlim())
+        else:
+            ax_top.set_xticks([])
+            ax_top.set_xticklabels([])
+
+        self.view.blitter.update([])
+
+class NearMissView:
+    # One figure with a bar panel per metric; the streamer and sort radios
+    # are shared, every panel has its own threshold slider.
+    def __init__(self, metric_names):
+        self.metric_names = list(metric_names)
+        self.current_streamer = streamer_names[0]
+        self.sort_method = 'Datetime'
+        n = len(self.metric_names)
+        self.fig = plt.figure(figsize=(panel_size[0], panel_height(n) * n))
+        self.blitter = Blitter(self.fig)
+        self.scheduler = FrameScheduler(self.fig)
+        self.panels = [MetricPanel(self, metric, i) for i, metric in enumerate(self.metric_names)]
+
+        self.radio = RadioButtons(self.fig.add_axes(panel_rect([0.02, 0.55, 0.12, 0.1], 0, n)), tuple(streamer_names) + ('Both',))
+        self.sort_radio = RadioButtons(self.fig.add_axes(panel_rect([0.02, 0.35, 0.12, 0.1], 0, n)), ('Datetime', 'FinalTime'))
+        self.radio.on_clicked(self.streamer_radio_func)
+        self.sort_radio.on_clicked(self.sort_radio_func)
+        self.update_plot()
+
+    def streamers(self):
+        if self.current_streamer == "Both":
+            return tuple(streamer_names)
+        return self.current_streamer
+
+    def update_plot(self, *args):
+        for panel in self.panels:
+            panel.update_plot()
+
+    def streamer_radio_func(self, label):
+        self.current_streamer = label
+        self.update_plot()
+
+    def sort_radio_func(self, label):
+        self.sort_method = label
+        self.update_plot()
+
+def show_near_misses(metric_names):
+    view = NearMissView(metric_names)
+    plt.show()
+    return view
@@ -0,0 +1,140 @@
+import math
+
+import numpy as np
+
+def is_interactive(canvas):
+    # File backends (Agg, svg, pdf) have no interactive framework and no
+    # event loop to run timers or show animated artists.
+    return canvas.required_interactive_framework is not None
+
+def can_blit(canvas):
+    return getattr(canvas, 'supports_blit', False) and is_interactive(canvas)
+
+def slider_artists(slider):
+    artists = [slider.poly, slider.valtext]
+    handle = getattr(slider, '_handle', None)
+    if handle is not None:
+        artists.append(handle)
+    return artists
+
+class Blitter:
+    # While a slider is dragged, updates that keep the figure layout only
+    # redraw the changed artists over a cached background. Anything else, or
+    # releasing the mouse, goes back to a normal full draw.
+    def __init__(self, fig):
+        self.fig = fig
+        self.canvas = fig.canvas
+        self.enabled = can_blit(self.canvas)
+        self.background = None
+        self.artists = []
+        if self.enabled:
+            self.canvas.mpl_connect('button_release_event', self.finish)
+            self.canvas.mpl_connect('resize_event', self.finish)
+
+    def add_slider(self, slider):
+        if self.enabled:
+            slider.drawon = False
+
+    def update(self, artists, slider=None):
+        dragging = slider is not None and slider.drag_active
+        if not self.enabled or not dragging:
+            self.finish()
+            return
+        artists = list(artists) + slider_artists(slider)
+        if self.background is None or artists != self.artists:
+            self.set_animated(False)
+            self.artists = artists
+            self.set_animated(True)
+            self.canvas.draw()
+            self.background = self.canvas.copy_from_bbox(self.fig.bbox)
+        self.canvas.restore_region(self.background)
+        for artist in self.artists:
+            self.fig.draw_artist(artist)
+        self.canvas.blit(self.fig.bbox)
+
+    def set_animated(self, value):
+        for artist in self.artists:
+            artist.set_animated(value)
+
+    def finish(self, event=None):
+        if self.artists:
+            self.set_animated(False)
+            self.artists = []
+        self.background = None
+        self.canvas.draw_idle()
+
+class BarSeries:
+    # Keeps the bar rectangles of one chart between redraws. New rectangles
+    # are only created when the count grows; surplus ones are hidden. If the
+    # axes were cleared in between, the old rectangles are simply dropped.
+    def __init__(self, ax, width=0.8):
+        self.ax = ax
+        self.width = width
+        self.bars = []
+
+    def update(self, heights, colors):
+        if self.bars and self.bars[0].axes is not self.ax:
+            self.bars = []
+        n = len(heights)
+        if n > len(self.bars):
+            start = len(self.bars)
+            extra = self.ax.bar(np.arange(start, n), np.zeros(n - start), width=self.width)
+            self.bars.extend(extra.patches)
+        for i, bar in enumerate(self.bars):
+            if i < n:
+                bar.set_x(i - self.width / 2)
+                bar.set_height(heights[i])
+                bar.set_facecolor(colors[i])
+                bar.set_visible(True)
+            elif bar.get_visible():
+                bar.set_visible(False)
+        self.ax.relim(visible_only=True)
+        self.ax.autoscale_view(scalex=False)
+        return self.bars[:n]
+
+class PieArtists:
+    # Reuses the wedges and texts of a pie when the next pie has the same
+    # number of wedges: angles, colors and text positions are updated in place
+    # with the same geometry as Axes.pie. Otherwise the pie is rebuilt.
+    def __init__(self, ax):
+        self.ax = ax
+        self.wedges = []
+        self.texts = []
+        self.autotexts = []
+
+    def update(self, sizes, labels, colors, autopct, startangle=90, pctdistance=0.6, labeldistance=1.1):
+        attached = bool(self.wedges) and self.wedges[0].axes is self.ax
+        if not attached or len(sizes) != len(self.wedges):
+            self.ax.clear()
+            self.wedges, self.texts, self.autotexts = self.ax.pie(
+                sizes,
+                labels=labels,
+                autopct=autopct,
+                startangle=startangle,
+                pctdistance=pctdistance,
+                labeldistance=labeldistance,
+                colors=colors
+            )
+            return True
+        fracs = np.asarray(sizes, dtype=float) / np.sum(sizes)
+        theta1 = startangle / 360
+        for i, (wedge, frac) in enumerate(zip(self.wedges, fracs)):
+            theta2 = theta1 + frac
+            wedge.set_theta1(360 * theta1)
+            wedge.set_theta2(360 * theta2)
+            wedge.set_facecolor(colors[i])
+            wedge.set_label(labels[i])
+            thetam = math.pi * (theta1 + theta2)
+            x, y = math.cos(thetam), math.sin(thetam)
+            text = self.texts[i]
+            text.set_position((labeldistance * x, labeldistance * y))
+            text.set_horizontalalignment('left' if labeldistance * x > 0 else 'right')
+            text.set_text(labels[i])
+            autotext = self.autotexts[i]
+            autotext.set_position((pctdistance * x, pctdistance * y))
+            autotext.set_text(autopct(100 * frac))
+            theta1 = theta2
+        return False
+
+    def artists(self):
+        return self.wedges + self.texts + self.autotexts
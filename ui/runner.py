@@ -0,0 +1,47 @@
+import os
+import sys
+
+base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(base_dir)
+
+from ui.launcher import warm_up, refresh, run_script
+
+# Lines starting with this on stdout are status reports for the launcher.
+marker = '@runner'
+
+def report(status):
+    print(f"{marker} {status}", flush=True)
+
+def report_first_draw():
+    # Reports once the chart has actually been drawn on screen.
+    import matplotlib.pyplot as plt
+    show = plt.show
+
+    def shown(*args, **kwargs):
+        canvas = plt.gcf().canvas
+        def drawn(event):
+            canvas.mpl_disconnect(cid)
+            report('drawn')
+        cid = canvas.mpl_connect('draw_event', drawn)
+        return show(*args, **kwargs)
+
+    plt.show = shown
+
+def main(argv=None):
+    # python ui/runner.py [--standby] script.py
+    # With --standby the libraries and data are loaded first and the script
+    # only starts once a line arrives on stdin.
+    argv = sys.argv[1:] if argv is None else argv
+    path = argv[-1]
+    if argv[:1] == ['--standby']:
+        warm_up()
+        report('standby')
+        if not sys.stdin.readline():
+            return
+        refresh()
+    report('started')
+    report_first_draw()
+    run_script(path)
+
+if __name__ == "__main__":
+    main()
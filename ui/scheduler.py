@@ -0,0 +1,84 @@
+import time
+from collections import deque
+
+from ui.render import is_interactive
+
+class FrameScheduler:
+    # Slider callbacks go through here instead of running on every event.
+    # Requests are kept per callback and only the latest arguments run; if
+    # the last run ended less than a frame ago, they run from a one-shot timer
+    # at the next frame, so a burst of drag events costs one recomputation.
+    # Without an interactive event loop every request runs at once.
+    def __init__(self, fig, fps=30):
+        self.canvas = fig.canvas
+        self.frame = 1 / fps
+        self.enabled = is_interactive(self.canvas)
+        self.pending = {}
+        self.last_run = 0
+        self.timer = None
+        self.armed = False
+
+    def wrap(self, func):
+        def callback(*args):
+            self.request(func, *args)
+        return callback
+
+    def request(self, func, *args):
+        if not self.enabled:
+            func(*args)
+            return
+        self.pending[func] = args
+        if self.armed:
+            return
+        wait = self.last_run + self.frame - time.perf_counter()
+        if wait <= 0:
+            self.flush()
+        else:
+            self.arm(wait)
+
+    def arm(self, wait):
+        if self.timer is None:
+            self.timer = self.canvas.new_timer()
+            self.timer.single_shot = True
+            self.timer.add_callback(self.flush)
+        self.timer.interval = max(1, int(wait * 1000))
+        self.armed = True
+        self.timer.start()
+
+    def flush(self):
+        self.armed = False
+        pending, self.pending = self.pending, {}
+        for func, args in pending.items():
+            func(*args)
+        # Measured after the work, so slow recomputations also leave the
+        # event loop a frame to catch up with the mouse.
+        self.last_run = time.perf_counter()
+
+class BackgroundQueue:
+    # Runs queued work one job per tick of a timer on the figure's event
+    # loop, so it happens between user events without a second thread
+    # touching the figure or the data. Without an interactive event loop
+    # jobs are dropped and the work is left to be done when first needed.
+    def __init__(self, fig, interval=1):
+        self.canvas = fig.canvas
+        self.enabled = is_interactive(self.canvas)
+        self.interval = interval
+        self.jobs = deque()
+        self.timer = None
+
+    def add(self, func, *args):
+        if not self.enabled:
+            return
+        self.jobs.append((func, args))
+        if self.timer is None:
+            self.timer = self.canvas.new_timer(interval=self.interval)
+            self.timer.add_callback(self.step)
+            self.timer.start()
+
+    def step(self):
+        if self.jobs:
+            func, args = self.jobs.popleft()
+            func(*args)
+        if not self.jobs and self.timer is not None:
+            self.timer.stop()
+            self.timer = None